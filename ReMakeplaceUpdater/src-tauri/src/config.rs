@@ -3,6 +3,8 @@ use anyhow::{Context, Result};
 use serde::{Deserialize, Serialize};
 use std::fs;
 use std::path::PathBuf;
+use std::sync::{Mutex, MutexGuard};
+use std::time::SystemTime;
 
 #[derive(Debug, Clone, Serialize, Deserialize)]
 pub struct Config {
@@ -29,18 +31,66 @@ fn default_installation_mode() -> InstallationMode {
     InstallationMode::Update
 }
 
+impl Config {
+    /// Directory the game is installed into
+    pub fn installation_dir(&self) -> PathBuf {
+        PathBuf::from(&self.installation_path)
+    }
+
+    /// Full path of the game executable inside the installation directory
+    pub fn executable_path(&self) -> PathBuf {
+        self.installation_dir().join(&self.exe_path)
+    }
+}
+
+/// Last config.json contents seen by this process, keyed on the file's size and mtime
+struct CachedConfig {
+    config: Config,
+    content: Vec<u8>,
+    modified: Option<SystemTime>,
+    len: u64,
+}
+
+impl CachedConfig {
+    fn new(config: Config, content: Vec<u8>, metadata: &fs::Metadata) -> Self {
+        Self {
+            config,
+            content,
+            modified: metadata.modified().ok(),
+            len: metadata.len(),
+        }
+    }
+
+    fn is_current(&self, metadata: &fs::Metadata) -> bool {
+        self.modified.is_some()
+            && self.modified == metadata.modified().ok()
+            && self.len == metadata.len()
+    }
+}
+
+static CONFIG_CACHE: Mutex<Option<CachedConfig>> = Mutex::new(None);
+
 pub struct ConfigManager;
 
 impl ConfigManager {
     pub fn load_config() -> Result<Config> {
         let config_path = Self::get_config_path();
 
-        if config_path.exists() {
-            let content = fs::read_to_string(&config_path).context("Failed to read config.json")?;
+        if let Ok(metadata) = fs::metadata(&config_path) {
+            let mut cache = Self::cache();
+
+            // Skip the read and parse when the file hasn't changed since we last saw it
+            if let Some(cached) = cache.as_ref().filter(|c| c.is_current(&metadata)) {
+                return Ok(cached.config.clone());
+            }
+
+            // Parse straight from bytes; serde_json validates UTF-8 as it goes
+            let content = fs::read(&config_path).context("Failed to read config.json")?;
 
             let config: Config =
-                serde_json::from_str(&content).context("Failed to parse config.json")?;
+                serde_json::from_slice(&content).context("Failed to parse config.json")?;
 
+            *cache = Some(CachedConfig::new(config.clone(), content, &metadata));
             Ok(config)
         } else {
             let default_config = Self::create_default();
@@ -51,13 +101,34 @@ impl ConfigManager {
 
     pub fn save_config(config: &Config) -> Result<()> {
         let config_path = Self::get_config_path();
-        let content = serde_json::to_string_pretty(config).context("Failed to serialize config")?;
+        let content = serde_json::to_vec_pretty(config).context("Failed to serialize config")?;
+
+        let mut cache = Self::cache();
+
+        // Saving an unchanged config is common (every settings close, every update check); skip the write
+        if let Some(cached) = cache.as_ref() {
+            let unchanged = cached.content == content
+                && fs::metadata(&config_path)
+                    .map(|m| cached.is_current(&m))
+                    .unwrap_or(false);
+            if unchanged {
+                return Ok(());
+            }
+        }
 
-        fs::write(&config_path, content).context("Failed to write config.json")?;
+        fs::write(&config_path, &content).context("Failed to write config.json")?;
+
+        *cache = fs::metadata(&config_path)
+            .ok()
+            .map(|metadata| CachedConfig::new(config.clone(), content, &metadata));
 
         Ok(())
     }
 
+    fn cache() -> MutexGuard<'static, Option<CachedConfig>> {
+        CONFIG_CACHE.lock().unwrap_or_else(|e| e.into_inner())
+    }
+
     pub fn create_default() -> Config {
         Config {
             current_version: "0.0.0".to_string(),
@@ -95,8 +166,8 @@ impl ConfigManager {
 
         let path_buf = PathBuf::from(path);
 
-        // Check if path exists
-        if !path_buf.exists() {
+        // Check if path exists; a single metadata call also tells us whether it's a directory
+        let Ok(metadata) = fs::metadata(&path_buf) else {
             return Err(ErrorInfo {
                 category: crate::error_handler::ErrorCategory::FileSystem,
                 user_message: "The selected directory does not exist.".to_string(),
@@ -104,10 +175,10 @@ impl ConfigManager {
                 recovery_suggestion: "Create the directory or select an existing one.".to_string(),
                 is_retryable: false,
             });
-        }
+        };
 
         // Check if it's a directory
-        if !path_buf.is_dir() {
+        if !metadata.is_dir() {
             return Err(ErrorInfo {
                 category: crate::error_handler::ErrorCategory::Validation,
                 user_message: "The selected path is not a directory.".to_string(),
@@ -136,7 +207,7 @@ impl ConfigManager {
             InstallationMode::Update => {
                 // For updates, exe must exist
                 let exe_path = path_buf.join(exe_name);
-                if !exe_path.exists() {
+                let Ok(exe_metadata) = fs::metadata(&exe_path) else {
                     return Err(ErrorInfo {
                         category: crate::error_handler::ErrorCategory::Validation,
                         user_message: format!(
@@ -149,9 +220,9 @@ impl ConfigManager {
                                 .to_string(),
                         is_retryable: false,
                     });
-                }
+                };
 
-                if !exe_path.is_file() {
+                if !exe_metadata.is_file() {
                     return Err(ErrorInfo {
                         category: crate::error_handler::ErrorCategory::Validation,
                         user_message: format!(
@@ -168,9 +239,8 @@ impl ConfigManager {
             }
             InstallationMode::FreshInstall => {
                 // For fresh installs, check if directory is empty or warn if it contains files
-                if let Ok(entries) = std::fs::read_dir(&path_buf) {
-                    let count = entries.count();
-                    if count > 0 {
+                if let Ok(mut entries) = std::fs::read_dir(&path_buf) {
+                    if entries.next().is_some() {
                         // This is a warning, not an error - we still allow it
                         println!("Warning: Directory is not empty, installation will merge files");
                     }
@@ -186,13 +256,12 @@ impl ConfigManager {
             return InstallationMode::FreshInstall;
         }
 
-        let path_buf = PathBuf::from(path);
-        if !path_buf.exists() {
-            return InstallationMode::FreshInstall;
-        }
-
-        let exe_path = path_buf.join(exe_name);
-        if exe_path.exists() && exe_path.is_file() {
+        // A missing directory makes the metadata lookup fail too, so one call covers both cases
+        let exe_path = PathBuf::from(path).join(exe_name);
+        if fs::metadata(&exe_path)
+            .map(|m| m.is_file())
+            .unwrap_or(false)
+        {
             InstallationMode::Update
         } else {
             InstallationMode::FreshInstall
@@ -4,8 +4,9 @@ use anyhow::{Context, Result};
 use rand::random;
 use serde::Serialize;
 use std::fs;
-use std::io::{Read, Write};
+use std::io::{BufWriter, Read, Write};
 use std::path::{Path, PathBuf};
+use std::sync::{Mutex, MutexGuard, OnceLock};
 use std::time::Instant;
 use tokio::time::{sleep, timeout, Duration};
 
@@ -20,9 +21,78 @@ pub struct ProgressInfo {
     pub retry_reason: Option<String>,
 }
 
+/// Exponential moving average of throughput, sampled on each progress tick
+struct SpeedMeter {
+    last_bytes: u64,
+    last_time: Instant,
+    speed: Option<f64>,
+}
+
+impl SpeedMeter {
+    /// Weight given to the newest sample
+    const SMOOTHING: f64 = 0.3;
+
+    fn new(bytes: u64) -> Self {
+        Self {
+            last_bytes: bytes,
+            last_time: Instant::now(),
+            speed: None,
+        }
+    }
+
+    /// Records the running byte count and returns the smoothed speed in MB/s
+    fn sample(&mut self, bytes: u64) -> f64 {
+        let now = Instant::now();
+        let elapsed = now.duration_since(self.last_time).as_secs_f64();
+
+        if elapsed > 0.0 {
+            let current =
+                (bytes.saturating_sub(self.last_bytes) as f64) / (1024.0 * 1024.0) / elapsed;
+            self.speed = Some(match self.speed {
+                Some(speed) => speed * (1.0 - Self::SMOOTHING) + current * Self::SMOOTHING,
+                None => current,
+            });
+            self.last_bytes = bytes;
+            self.last_time = now;
+        }
+
+        self.speed.unwrap_or(0.0)
+    }
+}
+
 pub struct Downloader;
 
 impl Downloader {
+    /// Downloads smaller than this stay on a single connection
+    const PARALLEL_MIN_SIZE: u64 = 16 * 1024 * 1024;
+    /// Number of concurrent ranged requests used for large downloads
+    const PARALLEL_SEGMENTS: u64 = 4;
+    /// Network chunks are small; buffer them so the disk sees large sequential writes
+    const WRITE_BUFFER_SIZE: usize = 1024 * 1024;
+    /// Marker left in the cache once an update's files are in place
+    const APPLIED_MARKER: &'static str = ".applied_version";
+
+    /// Process-wide HTTP client so the update check, probes and segments share pooled connections
+    pub fn http_client() -> Result<&'static reqwest::Client> {
+        static CLIENT: OnceLock<reqwest::Client> = OnceLock::new();
+
+        if let Some(client) = CLIENT.get() {
+            return Ok(client);
+        }
+
+        // Browser-like UA; some mirrors reject unknown agents
+        let client = reqwest::Client::builder()
+            .pool_idle_timeout(Duration::from_secs(90))
+            .pool_max_idle_per_host(10)
+            .tcp_keepalive(Duration::from_secs(60))
+            .connect_timeout(Duration::from_secs(30))
+            .user_agent("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
+            .build()
+            .context("Failed to build HTTP client")?;
+
+        Ok(CLIENT.get_or_init(|| client))
+    }
+
     pub async fn download_file<F>(url: &str, filepath: &Path, progress_callback: F) -> Result<()>
     where
         F: Fn(ProgressInfo) + Send + 'static,
@@ -40,27 +110,22 @@ impl Downloader {
         F: Fn(ProgressInfo) + Send + 'static,
     {
         let retry_manager = RetryManager::for_network_operations();
+        let client = Self::http_client()?;
 
-        // Reuse a single HTTP client across attempts with a browser-like UA
-        let client = reqwest::Client::builder()
-            .pool_idle_timeout(Duration::from_secs(90))
-            .pool_max_idle_per_host(10)
-            .tcp_keepalive(Duration::from_secs(60))
-            .connect_timeout(Duration::from_secs(30))
-            .user_agent("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
-            .build()
-            .context("Failed to build HTTP client")?;
+        // Bytes land in a .part file that only takes the real name once complete, so a file
+        // under the final name is always a finished download and a .part is always resumable
+        let part_path = Self::get_partial_filepath(filepath);
 
         let mut attempt: u32 = 0;
         let mut last_error: Option<anyhow::Error> = None;
 
         loop {
-            let resume_this_attempt = resume || filepath.exists();
+            let resume_this_attempt = resume || part_path.exists();
 
             let result = Self::download_file_internal(
-                &client,
+                client,
                 url,
-                filepath,
+                &part_path,
                 resume_this_attempt,
                 &progress_callback,
                 attempt,
@@ -68,7 +133,10 @@ impl Downloader {
             .await;
 
             match result {
-                Ok(()) => return Ok(()),
+                Ok(()) => {
+                    return fs::rename(&part_path, filepath)
+                        .context("Failed to move completed download into place");
+                }
                 Err(e) => {
                     last_error = Some(e);
 
@@ -168,6 +236,37 @@ impl Downloader {
             }
         }
 
+        // Optional per-process throttling for testing: set DOWNLOADER_MAX_BPS to cap speed (bytes/sec)
+        let max_bps: Option<u64> = std::env::var("DOWNLOADER_MAX_BPS")
+            .ok()
+            .and_then(|v| v.parse::<u64>().ok())
+            .filter(|&v| v > 0);
+
+        // Optional per-process failure injection for testing unstable connections
+        let fail_pct: u8 = std::env::var("DOWNLOADER_FAIL_PCT")
+            .ok()
+            .and_then(|v| v.parse::<u8>().ok())
+            .unwrap_or(0);
+
+        // Fresh downloads of large files are split across several connections when the server allows it.
+        // Throttled test runs stay on one connection so the cap applies to the whole transfer.
+        // Windows stays on one connection too: NTFS zero-fills everything before an out-of-order
+        // write, so a segment starting at 75% would stall on a synchronous fill of the first 75%.
+        if start_byte == 0 && max_bps.is_none() && !cfg!(windows) {
+            if let Some(total_size) = Self::probe_parallel_download(client, url).await {
+                return Self::download_parallel(
+                    client,
+                    url,
+                    filepath,
+                    total_size,
+                    fail_pct,
+                    progress_callback,
+                    current_retry_count,
+                )
+                .await;
+            }
+        }
+
         // Prepare and send request, ensuring proper 206 handling on resume
         let response = loop {
             let mut request = client.get(url).header("Connection", "keep-alive");
@@ -217,7 +316,7 @@ impl Downloader {
             }
         };
 
-        let mut file = if start_byte > 0 {
+        let file = if start_byte > 0 {
             std::fs::OpenOptions::new()
                 .create(true)
                 .append(true)
@@ -226,25 +325,15 @@ impl Downloader {
         } else {
             std::fs::File::create(filepath).context("Failed to create download file")?
         };
+        let mut file = BufWriter::with_capacity(Self::WRITE_BUFFER_SIZE, file);
 
         let mut downloaded = start_byte;
-        let start_time = Instant::now();
+        let mut speed_meter = SpeedMeter::new(start_byte);
         let mut last_update = Instant::now();
 
-        // Optional per-process throttling for testing: set DOWNLOADER_MAX_BPS to cap speed (bytes/sec)
-        let max_bps: Option<u64> = std::env::var("DOWNLOADER_MAX_BPS")
-            .ok()
-            .and_then(|v| v.parse::<u64>().ok())
-            .filter(|&v| v > 0);
         let throttle_start = Instant::now();
         let mut throttle_bytes: u64 = 0;
 
-        // Optional per-process failure injection for testing unstable connections
-        let fail_pct: u8 = std::env::var("DOWNLOADER_FAIL_PCT")
-            .ok()
-            .and_then(|v| v.parse::<u8>().ok())
-            .unwrap_or(0);
-
         let mut stream = response.bytes_stream();
         use futures_util::StreamExt;
 
@@ -285,13 +374,7 @@ impl Downloader {
 
             // Update progress every 100ms
             if last_update.elapsed().as_millis() >= 100 {
-                let elapsed = start_time.elapsed().as_secs_f64();
-                let speed = if elapsed > 0.0 {
-                    ((downloaded - start_byte) as f64) / (1024.0 * 1024.0) / elapsed
-                // MB/s
-                } else {
-                    0.0
-                };
+                let speed = speed_meter.sample(downloaded);
 
                 let percentage = if total_size > 0 {
                     (downloaded as f64 / total_size as f64) * 100.0
@@ -313,6 +396,8 @@ impl Downloader {
             }
         }
 
+        file.flush().context("Failed to flush download file")?;
+
         // If server provided total size, ensure we actually received it all
         if total_size > 0 && downloaded < total_size {
             return Err(anyhow::anyhow!(
@@ -323,17 +408,148 @@ impl Downloader {
         }
 
         // Final progress update
-        let elapsed = start_time.elapsed().as_secs_f64();
-        let speed = if elapsed > 0.0 {
-            ((downloaded - start_byte) as f64) / (1024.0 * 1024.0) / elapsed
-        } else {
-            0.0
+        progress_callback(ProgressInfo {
+            percentage: 100.0,
+            speed: speed_meter.sample(downloaded),
+            downloaded,
+            total: total_size,
+            retry_count: current_retry_count,
+            is_retrying: false,
+            retry_reason: None,
+        });
+
+        Ok(())
+    }
+
+    /// Reserves `len` bytes on disk so the download lands in as few extents as possible
+    fn preallocate(file: &fs::File, len: u64) -> std::io::Result<()> {
+        // set_len alone leaves a sparse file on Linux; fallocate reserves the blocks
+        #[cfg(target_os = "linux")]
+        {
+            use std::os::unix::io::AsRawFd;
+            let result = unsafe { libc::posix_fallocate(file.as_raw_fd(), 0, len as libc::off_t) };
+            if result == 0 {
+                return Ok(());
+            }
+            println!(
+                "posix_fallocate unavailable ({}), falling back to set_len",
+                std::io::Error::from_raw_os_error(result)
+            );
+        }
+
+        // Elsewhere this just sets the length; the file may stay sparse until each range is written
+        file.set_len(len)
+    }
+
+    /// Returns the total size when the server honours ranged GETs and the file is worth splitting
+    async fn probe_parallel_download(client: &reqwest::Client, url: &str) -> Option<u64> {
+        // A one-byte ranged GET confirms Range support and reports the full size in Content-Range
+        let response = client
+            .get(url)
+            .header("Range", "bytes=0-0")
+            .send()
+            .await
+            .ok()?;
+
+        if response.status() != reqwest::StatusCode::PARTIAL_CONTENT {
+            return None;
+        }
+
+        let total_size = response
+            .headers()
+            .get("content-range")?
+            .to_str()
+            .ok()?
+            .rsplit('/')
+            .next()?
+            .parse::<u64>()
+            .ok()?;
+
+        (total_size >= Self::PARALLEL_MIN_SIZE).then_some(total_size)
+    }
+
+    async fn download_parallel<F>(
+        client: &reqwest::Client,
+        url: &str,
+        filepath: &Path,
+        total_size: u64,
+        fail_pct: u8,
+        progress_callback: &F,
+        current_retry_count: u32,
+    ) -> Result<()>
+    where
+        F: Fn(ProgressInfo) + Send + 'static,
+    {
+        use futures_util::future::{select, try_join_all, Either};
+        use std::sync::atomic::{AtomicU64, Ordering};
+
+        println!(
+            "Downloading {} bytes in {} parallel segments",
+            total_size,
+            Self::PARALLEL_SEGMENTS
+        );
+
+        // Size the file up front so every segment can write at its own offset
+        let file = fs::File::create(filepath).context("Failed to create download file")?;
+        Self::preallocate(&file, total_size).context("Failed to preallocate download file")?;
+        drop(file);
+
+        let segment_size = (total_size + Self::PARALLEL_SEGMENTS - 1) / Self::PARALLEL_SEGMENTS;
+        let downloaded = AtomicU64::new(0);
+        let mut speed_meter = SpeedMeter::new(0);
+
+        let segments = (0..Self::PARALLEL_SEGMENTS)
+            .map(|i| i * segment_size)
+            .filter(|&start| start < total_size)
+            .map(|start| {
+                let end = (start + segment_size).min(total_size) - 1;
+                Self::download_segment_with_retry(
+                    client,
+                    url,
+                    filepath,
+                    start,
+                    end,
+                    fail_pct,
+                    &downloaded,
+                )
+            });
+
+        // Segments only bump a shared counter; progress is reported from here every 100ms.
+        // Racing the transfer against each tick means completion is noticed immediately
+        // instead of after the current tick runs out.
+        let mut transfer = Box::pin(try_join_all(segments));
+        let result = loop {
+            let tick = Box::pin(sleep(Duration::from_millis(100)));
+            match select(transfer, tick).await {
+                Either::Left((result, _)) => break result,
+                Either::Right(((), pending)) => transfer = pending,
+            }
+
+            let done = downloaded.load(Ordering::Relaxed);
+            let speed = speed_meter.sample(done);
+
+            progress_callback(ProgressInfo {
+                percentage: (done as f64 / total_size as f64) * 100.0,
+                speed,
+                downloaded: done,
+                total: total_size,
+                retry_count: current_retry_count,
+                is_retrying: false,
+                retry_reason: None,
+            });
         };
 
+        if let Err(e) = result {
+            // Segments already retried their own ranges. A preallocated file can't be resumed
+            // by length, so the next whole-download attempt starts over.
+            let _ = fs::remove_file(filepath);
+            return Err(e);
+        }
+
         progress_callback(ProgressInfo {
             percentage: 100.0,
-            speed,
-            downloaded,
+            speed: speed_meter.sample(total_size),
+            downloaded: total_size,
             total: total_size,
             retry_count: current_retry_count,
             is_retrying: false,
@@ -343,6 +559,152 @@ impl Downloader {
         Ok(())
     }
 
+    /// Fetches one byte range, resuming from the last byte written when the connection drops
+    /// instead of failing the whole parallel download
+    async fn download_segment_with_retry(
+        client: &reqwest::Client,
+        url: &str,
+        filepath: &Path,
+        start: u64,
+        end: u64,
+        fail_pct: u8,
+        downloaded: &std::sync::atomic::AtomicU64,
+    ) -> Result<()> {
+        let retry_manager = RetryManager::for_network_operations();
+        let mut offset = start;
+        let mut attempt: u32 = 0;
+
+        loop {
+            let (written, result) =
+                Self::download_segment(client, url, filepath, offset, end, fail_pct, downloaded)
+                    .await;
+            offset += written;
+
+            match result {
+                Ok(()) => return Ok(()),
+                // The range is complete even if the connection dropped after the last byte
+                Err(_) if offset > end => return Ok(()),
+                Err(e) if attempt < retry_manager.max_retries && retry_manager.should_retry(&e) => {
+                    println!(
+                        "Segment {}-{} interrupted at byte {} ({}), retrying",
+                        start, end, offset, e
+                    );
+                    sleep(retry_manager.calculate_delay_with_jitter(attempt)).await;
+                    attempt += 1;
+                }
+                Err(e) => return Err(e),
+            }
+        }
+    }
+
+    /// Writes bytes `start..=end` at their offset in the file. Returns how many bytes are
+    /// known to be on disk alongside the outcome, so a retry can pick up after them.
+    async fn download_segment(
+        client: &reqwest::Client,
+        url: &str,
+        filepath: &Path,
+        start: u64,
+        end: u64,
+        fail_pct: u8,
+        downloaded: &std::sync::atomic::AtomicU64,
+    ) -> (u64, Result<()>) {
+        use futures_util::StreamExt;
+        use std::io::{Seek, SeekFrom};
+        use std::sync::atomic::Ordering;
+
+        let response = match client
+            .get(url)
+            .header("Range", format!("bytes={}-{}", start, end))
+            .send()
+            .await
+        {
+            Ok(response) => response,
+            Err(e) => {
+                return (
+                    0,
+                    Err(anyhow::Error::new(e).context("Failed to start download")),
+                )
+            }
+        };
+
+        let status = response.status();
+        if status != reqwest::StatusCode::PARTIAL_CONTENT {
+            return (
+                0,
+                Err(anyhow::anyhow!(
+                    "Download failed with status: {} for range {}-{}",
+                    status,
+                    start,
+                    end
+                )),
+            );
+        }
+
+        let file = fs::OpenOptions::new()
+            .write(true)
+            .open(filepath)
+            .and_then(|mut file| file.seek(SeekFrom::Start(start)).map(|_| file));
+        let mut file = match file {
+            Ok(file) => BufWriter::with_capacity(Self::WRITE_BUFFER_SIZE, file),
+            Err(e) => {
+                return (
+                    0,
+                    Err(anyhow::Error::new(e).context("Failed to open download file")),
+                )
+            }
+        };
+
+        let expected = end - start + 1;
+        let mut received = 0u64;
+        let mut stream = response.bytes_stream();
+        let read_timeout = Duration::from_secs(30);
+
+        let streamed: Result<()> = async {
+            while let Some(next_chunk) = timeout(read_timeout, stream.next())
+                .await
+                .map_err(|_| anyhow::anyhow!("Chunk read timed out"))?
+            {
+                let chunk = next_chunk.context("Failed to read download chunk")?;
+                file.write_all(&chunk)
+                    .context("Failed to write download chunk")?;
+
+                received += chunk.len() as u64;
+                downloaded.fetch_add(chunk.len() as u64, Ordering::Relaxed);
+
+                // Inject simulated connection resets to test retry handling
+                if fail_pct > 0 && random::<u8>() % 100 < fail_pct {
+                    return Err(anyhow::anyhow!("Connection reset by peer (simulated)"));
+                }
+            }
+            Ok(())
+        }
+        .await;
+
+        // Buffered bytes only count as written once they reach the file, even when the
+        // stream failed; if that fails too, the retry re-fetches this attempt's bytes
+        if let Err(e) = file.flush() {
+            downloaded.fetch_sub(received, Ordering::Relaxed);
+            let error = streamed
+                .err()
+                .unwrap_or_else(|| anyhow::Error::new(e).context("Failed to flush download file"));
+            return (0, Err(error));
+        }
+
+        let result = streamed.and_then(|()| {
+            if received < expected {
+                Err(anyhow::anyhow!(
+                    "Download ended prematurely: received {} of {} bytes",
+                    received,
+                    expected
+                ))
+            } else {
+                Ok(())
+            }
+        });
+
+        (received, result)
+    }
+
     async fn test_range_support(client: &reqwest::Client, url: &str) -> Result<bool> {
         // Send a HEAD request to check if server accepts Range requests
         let response = client
@@ -434,11 +796,12 @@ impl Downloader {
     }
 
     pub fn validate_cached_file(filepath: &Path, expected_size: Option<u64>) -> Result<bool> {
-        if !filepath.exists() {
-            return Ok(false);
-        }
-
-        let metadata = fs::metadata(filepath).context("Failed to get file metadata")?;
+        // A missing file is just "not cached"; one metadata call answers both questions
+        let metadata = match fs::metadata(filepath) {
+            Ok(metadata) => metadata,
+            Err(e) if e.kind() == std::io::ErrorKind::NotFound => return Ok(false),
+            Err(e) => return Err(e).context("Failed to get file metadata"),
+        };
 
         let file_size = metadata.len();
 
@@ -487,26 +850,24 @@ impl Downloader {
         }
     }
 
-    pub fn manage_cache(cache_dir: &Path, keep_current: bool) -> Result<()> {
-        if !cache_dir.exists() {
-            return Ok(());
-        }
-
-        let entries = fs::read_dir(cache_dir).context("Failed to read cache directory")?;
-
-        for entry in entries {
-            let entry = entry.context("Failed to read cache entry")?;
-            let path = entry.path();
+    /// Cleanups run on the blocking pool and can be started from several commands at once
+    /// (install, Clear Cache, startup recovery); take turns so they never delete the
+    /// same directory concurrently
+    fn cache_cleanup_lock() -> MutexGuard<'static, ()> {
+        static CLEANUP: Mutex<()> = Mutex::new(());
+        CLEANUP.lock().unwrap_or_else(|e| e.into_inner())
+    }
 
-            if path.is_file() {
-                // Remove old cache files, keep current if specified
-                if !keep_current || !Self::is_current_version_file(&path) {
-                    let _ = fs::remove_file(&path); // Ignore errors for cleanup
-                }
+    /// Removes the whole cache directory in one call rather than walking it.
+    /// Downloads recreate it on demand.
+    pub fn wipe_cache(cache_dir: &Path) -> Result<()> {
+        let _guard = Self::cache_cleanup_lock();
+        match fs::remove_dir_all(cache_dir) {
+            Err(e) if e.kind() != std::io::ErrorKind::NotFound => {
+                Err(e).context("Failed to remove cache directory")
             }
+            _ => Ok(()),
         }
-
-        Ok(())
     }
 
     pub fn get_cache_filepath(cache_dir: &Path, version: &str, original_filename: &str) -> PathBuf {
@@ -514,18 +875,33 @@ impl Downloader {
         cache_dir.join(cache_filename)
     }
 
+    fn get_partial_filepath(filepath: &Path) -> PathBuf {
+        let mut name = filepath.file_name().unwrap_or_default().to_os_string();
+        name.push(".part");
+        filepath.with_file_name(name)
+    }
+
     pub fn get_cache_directory() -> PathBuf {
         PathBuf::from("update_cache")
     }
 
-    fn is_current_version_file(path: &Path) -> bool {
-        // Simple heuristic: assume files starting with the latest version are current
-        // This could be improved with actual version tracking
-        if let Some(filename) = path.file_name().and_then(|n| n.to_str()) {
-            // This is a simplified check - in a real implementation, you'd track the current version
-            !filename.starts_with("v0.") // Placeholder logic
-        } else {
-            false
-        }
+    /// Records that `version` has been extracted into the installation.
+    ///
+    /// Written to a temporary file and renamed into place, so a crash leaves either no
+    /// marker or a complete one.
+    pub fn write_applied_marker(cache_dir: &Path, version: &str) -> Result<()> {
+        fs::create_dir_all(cache_dir).context("Failed to create cache directory")?;
+        let marker = cache_dir.join(Self::APPLIED_MARKER);
+        let temp = Self::get_partial_filepath(&marker);
+        fs::write(&temp, version).context("Failed to write applied-update marker")?;
+        fs::rename(&temp, &marker).context("Failed to commit applied-update marker")?;
+        Ok(())
+    }
+
+    /// Version recorded by `write_applied_marker`, if an applied update hasn't been finalized
+    pub fn applied_marker_version(cache_dir: &Path) -> Option<String> {
+        let version = fs::read_to_string(cache_dir.join(Self::APPLIED_MARKER)).ok()?;
+        let version = version.trim();
+        (!version.is_empty()).then(|| version.to_string())
     }
 }
@@ -1,12 +1,48 @@
+use crate::install_manifest::InstallManifest;
 use anyhow::{Context, Result};
 use std::fs;
 use std::io::Read;
-use std::path::Path;
+use std::path::{Path, PathBuf};
+use std::process::{Command, Stdio};
+use std::sync::OnceLock;
 
 pub struct Extractor;
 
+/// One archive entry as listed by the 7-Zip command line
+#[derive(Debug, Default, PartialEq)]
+struct SevenZipEntry {
+    name: String,
+    size: u64,
+    crc: Option<u32>,
+    is_directory: bool,
+}
+
 impl Extractor {
-    pub async fn extract_archive(archive_path: &Path, destination: &Path) -> Result<()> {
+    /// Extracts `archive_path` into `destination`. Existing files under any of the
+    /// `preserve_folders` (relative to `destination`) are left untouched.
+    pub async fn extract_archive(
+        archive_path: &Path,
+        destination: &Path,
+        preserve_folders: &[String],
+    ) -> Result<()> {
+        // Decompression and file writes block; keep them on tokio's blocking pool so the
+        // runtime stays free to deliver events while a large archive is unpacked
+        let archive_path = archive_path.to_path_buf();
+        let destination = destination.to_path_buf();
+        let preserve_folders = preserve_folders.to_vec();
+
+        tokio::task::spawn_blocking(move || {
+            Self::extract_archive_blocking(&archive_path, &destination, &preserve_folders)
+        })
+        .await
+        .context("Extraction task failed")?
+    }
+
+    fn extract_archive_blocking(
+        archive_path: &Path,
+        destination: &Path,
+        preserve_folders: &[String],
+    ) -> Result<()> {
         if !archive_path.exists() {
             return Err(anyhow::anyhow!("Archive file does not exist"));
         }
@@ -22,13 +58,29 @@ impl Extractor {
 
         println!("Extracting archive: {}", file_name);
 
+        let preserved: Vec<PathBuf> = preserve_folders
+            .iter()
+            .map(|folder| destination.join(folder))
+            .collect();
+
+        // Files written by the previous update that are still untouched can be skipped
+        let previous = InstallManifest::load(destination);
+        let mut manifest = InstallManifest::default();
+
         // Try extraction methods in order of preference
         let mut last_error = None;
 
         // Try 7z extraction
-        match Self::try_extract_7z(archive_path, destination).await {
+        match Self::try_extract_7z(
+            archive_path,
+            destination,
+            &preserved,
+            &previous,
+            &mut manifest,
+        ) {
             Ok(()) => {
                 println!("Successfully extracted using: 7z detection");
+                Self::save_manifest(&manifest, destination);
                 return Ok(());
             }
             Err(e) => {
@@ -38,9 +90,16 @@ impl Extractor {
         }
 
         // Try ZIP extraction
-        match Self::try_extract_zip(archive_path, destination).await {
+        match Self::try_extract_zip(
+            archive_path,
+            destination,
+            &preserved,
+            &previous,
+            &mut manifest,
+        ) {
             Ok(()) => {
                 println!("Successfully extracted using: ZIP detection");
+                Self::save_manifest(&manifest, destination);
                 return Ok(());
             }
             Err(e) => {
@@ -50,7 +109,7 @@ impl Extractor {
         }
 
         // Try TAR.GZ extraction
-        match Self::try_extract_tar_gz(archive_path, destination).await {
+        match Self::try_extract_tar_gz(archive_path, destination, &preserved) {
             Ok(()) => {
                 println!("Successfully extracted using: TAR.GZ detection");
                 return Ok(());
@@ -62,7 +121,7 @@ impl Extractor {
         }
 
         // Try TAR.BZ2 extraction
-        match Self::try_extract_tar_bz2(archive_path, destination).await {
+        match Self::try_extract_tar_bz2(archive_path, destination, &preserved) {
             Ok(()) => {
                 println!("Successfully extracted using: TAR.BZ2 detection");
                 return Ok(());
@@ -74,7 +133,7 @@ impl Extractor {
         }
 
         // Try TAR.XZ extraction
-        match Self::try_extract_tar_xz(archive_path, destination).await {
+        match Self::try_extract_tar_xz(archive_path, destination, &preserved) {
             Ok(()) => {
                 println!("Successfully extracted using: TAR.XZ detection");
                 return Ok(());
@@ -86,7 +145,7 @@ impl Extractor {
         }
 
         // Try TAR.ZST extraction
-        match Self::try_extract_tar_zst(archive_path, destination).await {
+        match Self::try_extract_tar_zst(archive_path, destination, &preserved) {
             Ok(()) => {
                 println!("Successfully extracted using: TAR.ZST detection");
                 return Ok(());
@@ -98,7 +157,7 @@ impl Extractor {
         }
 
         // Try TAR extraction
-        match Self::try_extract_tar(archive_path, destination).await {
+        match Self::try_extract_tar(archive_path, destination, &preserved) {
             Ok(()) => {
                 println!("Successfully extracted using: TAR detection");
                 return Ok(());
@@ -110,7 +169,7 @@ impl Extractor {
         }
 
         // Try GZ extraction
-        match Self::try_extract_gz(archive_path, destination).await {
+        match Self::try_extract_gz(archive_path, destination) {
             Ok(()) => {
                 println!("Successfully extracted using: GZ detection");
                 return Ok(());
@@ -122,7 +181,7 @@ impl Extractor {
         }
 
         // Try BZ2 extraction
-        match Self::try_extract_bz2(archive_path, destination).await {
+        match Self::try_extract_bz2(archive_path, destination) {
             Ok(()) => {
                 println!("Successfully extracted using: BZ2 detection");
                 return Ok(());
@@ -134,7 +193,7 @@ impl Extractor {
         }
 
         // Try XZ extraction
-        match Self::try_extract_xz(archive_path, destination).await {
+        match Self::try_extract_xz(archive_path, destination) {
             Ok(()) => {
                 println!("Successfully extracted using: XZ detection");
                 return Ok(());
@@ -146,7 +205,7 @@ impl Extractor {
         }
 
         // Try ZST extraction
-        match Self::try_extract_zst(archive_path, destination).await {
+        match Self::try_extract_zst(archive_path, destination) {
             Ok(()) => {
                 println!("Successfully extracted using: ZST detection");
                 return Ok(());
@@ -161,7 +220,13 @@ impl Extractor {
         Err(last_error.unwrap_or_else(|| anyhow::anyhow!("No extraction method succeeded")))
     }
 
-    async fn try_extract_7z(archive_path: &Path, destination: &Path) -> Result<()> {
+    fn try_extract_7z(
+        archive_path: &Path,
+        destination: &Path,
+        preserved: &[PathBuf],
+        previous: &InstallManifest,
+        manifest: &mut InstallManifest,
+    ) -> Result<()> {
         // Check if this is likely a 7z file
         let file_name = archive_path
             .file_name()
@@ -173,60 +238,432 @@ impl Extractor {
             return Err(anyhow::anyhow!("Not a 7z file"));
         }
 
+        // Prefer the native 7-Zip CLI: its multi-threaded LZMA2 decoder is several times
+        // faster than sevenz-rust on multi-core machines
+        if let Some(seven_zip) = Self::find_7z_binary() {
+            println!(
+                "Attempting 7z extraction with native binary: {}",
+                seven_zip.display()
+            );
+
+            match Self::extract_with_7z_binary(
+                seven_zip,
+                archive_path,
+                destination,
+                preserved,
+                previous,
+                manifest,
+            ) {
+                Ok(()) => return Ok(()),
+                Err(e) => println!("Native 7z extraction failed, falling back: {}", e),
+            }
+        }
+
         println!("Attempting 7z extraction with sevenz-rust...");
 
-        // Try with sevenz-rust
-        sevenz_rust::decompress_file(archive_path, destination)
-            .context("Failed to extract 7z archive with sevenz-rust")?;
+        // Try with sevenz-rust, skipping entries that would overwrite preserved user data
+        // or that are already installed unchanged
+        sevenz_rust::decompress_file_with_extract_fn(
+            archive_path,
+            destination,
+            |entry, reader, dest| {
+                let crc = entry.crc as u32;
+                let unchanged =
+                    entry.has_crc && previous.is_unchanged(&entry.name, crc, entry.size, dest);
+
+                if unchanged || Self::is_preserved(dest, preserved) {
+                    // Drain the entry so the solid stream stays positioned for the next one
+                    std::io::copy(reader, &mut std::io::sink())?;
+                    if unchanged {
+                        manifest.record(&entry.name, crc, dest);
+                    }
+                    return Ok(true);
+                }
+
+                let extracted = sevenz_rust::default_entry_extract_fn(entry, reader, dest)?;
+                if entry.has_crc && !entry.is_directory {
+                    manifest.record(&entry.name, crc, dest);
+                }
+                Ok(extracted)
+            },
+        )
+        .context("Failed to extract 7z archive with sevenz-rust")?;
 
         Ok(())
     }
 
-    async fn try_extract_zip(archive_path: &Path, destination: &Path) -> Result<()> {
-        println!("Attempting ZIP extraction...");
+    /// Locates a 7-Zip command line binary once per process
+    fn find_7z_binary() -> Option<&'static Path> {
+        static SEVEN_ZIP: OnceLock<Option<PathBuf>> = OnceLock::new();
+
+        SEVEN_ZIP
+            .get_or_init(|| {
+                // 7-Zip's installer doesn't add itself to PATH on Windows
+                let install_dirs: Vec<PathBuf> = if cfg!(windows) {
+                    ["ProgramFiles", "ProgramFiles(x86)"]
+                        .iter()
+                        .filter_map(std::env::var_os)
+                        .map(|dir| PathBuf::from(dir).join("7-Zip").join("7z.exe"))
+                        .collect()
+                } else {
+                    Vec::new()
+                };
+
+                let mut candidates = ["7z", "7zz", "7za"]
+                    .iter()
+                    .map(PathBuf::from)
+                    .chain(install_dirs);
+
+                candidates.find(|candidate| {
+                    // Running without arguments prints usage and exits 0
+                    Self::seven_zip_command(candidate)
+                        .stdout(Stdio::null())
+                        .stderr(Stdio::null())
+                        .status()
+                        .map(|s| s.success())
+                        .unwrap_or(false)
+                })
+            })
+            .as_deref()
+    }
 
-        let file = fs::File::open(archive_path).context("Failed to open zip file")?;
+    fn extract_with_7z_binary(
+        seven_zip: &Path,
+        archive_path: &Path,
+        destination: &Path,
+        preserved: &[PathBuf],
+        previous: &InstallManifest,
+        manifest: &mut InstallManifest,
+    ) -> Result<()> {
+        let entries = Self::list_7z_entries(seven_zip, archive_path)?;
+        if entries.is_empty() {
+            // Without a listing nothing could be skipped or recorded; let sevenz-rust handle it
+            return Err(anyhow::anyhow!("7z listed no entries"));
+        }
 
-        let mut archive = zip::ZipArchive::new(file).context("Failed to read zip archive")?;
+        // Decide per entry before anything is written: files still installed unchanged are
+        // skipped, and existing user files in preserved folders are kept
+        let mut unchanged = Vec::new();
+        let mut keeps_user_copy = Vec::with_capacity(entries.len());
+        for entry in &entries {
+            let path = destination.join(&entry.name);
+            let crc = entry.crc.filter(|_| !entry.is_directory);
+            let is_unchanged = crc.map_or(false, |crc| {
+                previous.is_unchanged(&entry.name, crc, entry.size, &path)
+            });
+            if is_unchanged {
+                unchanged.push(entry.name.as_str());
+            }
+            keeps_user_copy.push(!is_unchanged && Self::is_preserved(&path, preserved));
+        }
 
-        for i in 0..archive.len() {
-            let mut file = archive.by_index(i).context("Failed to read zip entry")?;
+        // 7z can't skip existing files in some folders while overwriting the rest, so preserved
+        // folders that already exist are excluded from the main pass...
+        let existing: Vec<_> = preserved
+            .iter()
+            .filter(|dir| dir.exists())
+            .filter_map(|dir| dir.strip_prefix(destination).ok())
+            .collect();
 
-            let outpath = match file.enclosed_name() {
-                Some(path) => destination.join(path),
-                None => continue, // Skip entries with invalid names
-            };
+        let mut main_args: Vec<std::ffi::OsString> = existing
+            .iter()
+            .map(|relative| {
+                let mut arg = std::ffi::OsString::from("-xr!");
+                arg.push(relative);
+                arg
+            })
+            .collect();
+
+        // Unchanged files are excluded by exact name from a list file next to the archive
+        let mut list_file = archive_path.as_os_str().to_os_string();
+        list_file.push(".skip");
+        let list_file = PathBuf::from(list_file);
+        if !unchanged.is_empty() {
+            println!("Skipping {} unchanged files", unchanged.len());
+            fs::write(&list_file, unchanged.join("\n"))
+                .context("Failed to write 7z exclude list")?;
+
+            let mut exclude = std::ffi::OsString::from("-x@");
+            exclude.push(&list_file);
+            // Names are literal paths, not wildcards, and the list is written as UTF-8
+            main_args.extend(["-spd".into(), "-scsUTF-8".into(), exclude]);
+        }
 
-            if file.is_dir() {
-                fs::create_dir_all(&outpath).context("Failed to create directory")?;
-            } else {
-                if let Some(p) = outpath.parent() {
-                    if !p.exists() {
-                        fs::create_dir_all(p).context("Failed to create parent directory")?;
-                    }
+        let extracted = Self::run_7z_binary(seven_zip, archive_path, destination, main_args);
+        if !unchanged.is_empty() {
+            let _ = fs::remove_file(&list_file);
+        }
+        extracted?;
+
+        // ...and then extracted on their own without overwriting (-aos), so files a release adds
+        // there are still installed while the user's copies are left alone
+        if !existing.is_empty() {
+            let includes = existing.iter().map(|relative| {
+                let mut arg = std::ffi::OsString::from("-ir!");
+                arg.push(relative);
+                arg
+            });
+            let args = std::iter::once(std::ffi::OsString::from("-aos")).chain(includes);
+            Self::run_7z_binary(seven_zip, archive_path, destination, args)?;
+        }
+
+        for (entry, keeps_user_copy) in entries.iter().zip(keeps_user_copy) {
+            match entry.crc {
+                Some(crc) if !entry.is_directory && !keeps_user_copy => {
+                    manifest.record(&entry.name, crc, &destination.join(&entry.name))
                 }
+                _ => {}
+            }
+        }
 
-                let mut outfile =
-                    fs::File::create(&outpath).context("Failed to create output file")?;
+        Ok(())
+    }
+
+    /// Lists the archive's entries with their sizes and CRCs via `7z l -slt`
+    fn list_7z_entries(seven_zip: &Path, archive_path: &Path) -> Result<Vec<SevenZipEntry>> {
+        let output = Self::seven_zip_command(seven_zip)
+            .args(["l", "-slt", "-sccUTF-8"])
+            .arg(archive_path)
+            .stdout(Stdio::piped())
+            .stderr(Stdio::piped())
+            .output()
+            .context("Failed to run 7z binary")?;
+
+        if !output.status.success() {
+            return Err(anyhow::anyhow!(
+                "7z listing exited with {}: {}",
+                output.status,
+                String::from_utf8_lossy(&output.stderr).trim()
+            ));
+        }
+
+        Ok(Self::parse_7z_listing(&String::from_utf8_lossy(
+            &output.stdout,
+        )))
+    }
+
+    /// Parses the technical listing printed by `7z l -slt`
+    fn parse_7z_listing(listing: &str) -> Vec<SevenZipEntry> {
+        // Entry blocks follow the archive's own properties, after a line of dashes
+        let Some((_, body)) = listing.split_once("\n----------") else {
+            return Vec::new();
+        };
 
-                std::io::copy(&mut file, &mut outfile).context("Failed to extract file")?;
+        let mut entries = Vec::new();
+        let mut current: Option<SevenZipEntry> = None;
+
+        for line in body.lines() {
+            let Some((key, value)) = line
+                .split_once(" = ")
+                .or_else(|| line.strip_suffix(" =").map(|key| (key, "")))
+            else {
+                continue;
+            };
+
+            if key == "Path" {
+                entries.extend(current.take());
+                current = Some(SevenZipEntry {
+                    name: value.to_string(),
+                    ..Default::default()
+                });
+                continue;
             }
 
-            // Set file permissions on Unix-like systems
-            #[cfg(unix)]
-            {
-                use std::os::unix::fs::PermissionsExt;
-                if let Some(mode) = file.unix_mode() {
-                    fs::set_permissions(&outpath, fs::Permissions::from_mode(mode))
-                        .context("Failed to set file permissions")?;
+            let Some(entry) = current.as_mut() else {
+                continue;
+            };
+            match key {
+                "Size" => entry.size = value.trim().parse().unwrap_or(0),
+                "CRC" => entry.crc = u32::from_str_radix(value.trim(), 16).ok(),
+                "Folder" => entry.is_directory |= value.trim() == "+",
+                "Attributes" => entry.is_directory |= value.starts_with('D'),
+                _ => {}
+            }
+        }
+
+        entries.extend(current);
+        entries
+    }
+
+    fn seven_zip_command(seven_zip: &Path) -> Command {
+        let mut command = Command::new(seven_zip);
+        command.stdin(Stdio::null());
+
+        #[cfg(windows)]
+        {
+            use std::os::windows::process::CommandExt;
+            command.creation_flags(0x08000000); // CREATE_NO_WINDOW
+        }
+
+        command
+    }
+
+    fn run_7z_binary<I>(
+        seven_zip: &Path,
+        archive_path: &Path,
+        destination: &Path,
+        extra_args: I,
+    ) -> Result<()>
+    where
+        I: IntoIterator<Item = std::ffi::OsString>,
+    {
+        let mut output_arg = std::ffi::OsString::from("-o");
+        output_arg.push(destination);
+
+        let output = Self::seven_zip_command(seven_zip)
+            .arg("x")
+            .arg(archive_path)
+            .arg(output_arg)
+            .args(["-mmt=on", "-y", "-bso0", "-bsp0"])
+            .args(extra_args)
+            .stdout(Stdio::null())
+            .stderr(Stdio::piped())
+            .output()
+            .context("Failed to run 7z binary")?;
+
+        if !output.status.success() {
+            return Err(anyhow::anyhow!(
+                "7z exited with {}: {}",
+                output.status,
+                String::from_utf8_lossy(&output.stderr).trim()
+            ));
+        }
+
+        Ok(())
+    }
+
+    fn try_extract_zip(
+        archive_path: &Path,
+        destination: &Path,
+        preserved: &[PathBuf],
+        previous: &InstallManifest,
+        manifest: &mut InstallManifest,
+    ) -> Result<()> {
+        use std::sync::atomic::{AtomicUsize, Ordering};
+
+        println!("Attempting ZIP extraction...");
+
+        let file = fs::File::open(archive_path).context("Failed to open zip file")?;
+
+        let archive = zip::ZipArchive::new(file).context("Failed to read zip archive")?;
+        let entry_count = archive.len();
+        drop(archive);
+
+        // Zip entries are compressed independently, so each worker opens its own handle
+        // and pulls the next entry index until none are left
+        let workers = std::thread::available_parallelism()
+            .map(|n| n.get())
+            .unwrap_or(1)
+            .min(8)
+            .min(entry_count.max(1));
+        let next = AtomicUsize::new(0);
+
+        let results: Vec<Result<InstallManifest>> = std::thread::scope(|scope| {
+            let handles: Vec<_> = (0..workers)
+                .map(|_| {
+                    scope.spawn(|| -> Result<InstallManifest> {
+                        let file =
+                            fs::File::open(archive_path).context("Failed to open zip file")?;
+                        let mut archive =
+                            zip::ZipArchive::new(file).context("Failed to read zip archive")?;
+                        let mut written = InstallManifest::default();
+
+                        loop {
+                            let index = next.fetch_add(1, Ordering::Relaxed);
+                            if index >= entry_count {
+                                return Ok(written);
+                            }
+                            Self::extract_zip_entry(
+                                &mut archive,
+                                index,
+                                destination,
+                                preserved,
+                                previous,
+                                &mut written,
+                            )?;
+                        }
+                    })
+                })
+                .collect();
+
+            handles
+                .into_iter()
+                .map(|handle| {
+                    handle
+                        .join()
+                        .unwrap_or_else(|_| Err(anyhow::anyhow!("Zip extraction worker panicked")))
+                })
+                .collect()
+        });
+
+        for result in results {
+            manifest.merge(result?);
+        }
+
+        Ok(())
+    }
+
+    fn extract_zip_entry(
+        archive: &mut zip::ZipArchive<fs::File>,
+        index: usize,
+        destination: &Path,
+        preserved: &[PathBuf],
+        previous: &InstallManifest,
+        manifest: &mut InstallManifest,
+    ) -> Result<()> {
+        let mut file = archive
+            .by_index(index)
+            .context("Failed to read zip entry")?;
+
+        let outpath = match file.enclosed_name() {
+            Some(path) => destination.join(path),
+            None => return Ok(()), // Skip entries with invalid names
+        };
+
+        if Self::is_preserved(&outpath, preserved) {
+            return Ok(());
+        }
+
+        if !file.is_dir() && previous.is_unchanged(file.name(), file.crc32(), file.size(), &outpath)
+        {
+            manifest.record(file.name(), file.crc32(), &outpath);
+            return Ok(());
+        }
+
+        if file.is_dir() {
+            fs::create_dir_all(&outpath).context("Failed to create directory")?;
+        } else {
+            if let Some(p) = outpath.parent() {
+                if !p.exists() {
+                    fs::create_dir_all(p).context("Failed to create parent directory")?;
                 }
             }
+
+            let mut outfile = fs::File::create(&outpath).context("Failed to create output file")?;
+
+            std::io::copy(&mut file, &mut outfile).context("Failed to extract file")?;
+            drop(outfile);
+            manifest.record(file.name(), file.crc32(), &outpath);
+        }
+
+        // Set file permissions on Unix-like systems
+        #[cfg(unix)]
+        {
+            use std::os::unix::fs::PermissionsExt;
+            if let Some(mode) = file.unix_mode() {
+                fs::set_permissions(&outpath, fs::Permissions::from_mode(mode))
+                    .context("Failed to set file permissions")?;
+            }
         }
 
         Ok(())
     }
 
-    async fn try_extract_tar_gz(archive_path: &Path, destination: &Path) -> Result<()> {
+    fn try_extract_tar_gz(
+        archive_path: &Path,
+        destination: &Path,
+        preserved: &[PathBuf],
+    ) -> Result<()> {
         if !Self::file_has_extensions(archive_path, &[".tar.gz", ".tgz"]) {
             return Err(anyhow::anyhow!("Not a tar.gz file"));
         }
@@ -236,16 +673,19 @@ impl Extractor {
         let file = fs::File::open(archive_path).context("Failed to open tar.gz file")?;
 
         let decompressor = flate2::read::GzDecoder::new(file);
-        let mut archive = tar::Archive::new(decompressor);
+        let archive = tar::Archive::new(decompressor);
 
-        archive
-            .unpack(destination)
+        Self::unpack_tar(archive, destination, preserved)
             .context("Failed to extract tar.gz archive")?;
 
         Ok(())
     }
 
-    async fn try_extract_tar_bz2(archive_path: &Path, destination: &Path) -> Result<()> {
+    fn try_extract_tar_bz2(
+        archive_path: &Path,
+        destination: &Path,
+        preserved: &[PathBuf],
+    ) -> Result<()> {
         if !Self::file_has_extensions(archive_path, &[".tar.bz2", ".tbz2", ".tbz"]) {
             return Err(anyhow::anyhow!("Not a tar.bz2 file"));
         }
@@ -255,16 +695,19 @@ impl Extractor {
         let file = fs::File::open(archive_path).context("Failed to open tar.bz2 file")?;
 
         let decompressor = bzip2::read::BzDecoder::new(file);
-        let mut archive = tar::Archive::new(decompressor);
+        let archive = tar::Archive::new(decompressor);
 
-        archive
-            .unpack(destination)
+        Self::unpack_tar(archive, destination, preserved)
             .context("Failed to extract tar.bz2 archive")?;
 
         Ok(())
     }
 
-    async fn try_extract_tar_xz(archive_path: &Path, destination: &Path) -> Result<()> {
+    fn try_extract_tar_xz(
+        archive_path: &Path,
+        destination: &Path,
+        preserved: &[PathBuf],
+    ) -> Result<()> {
         if !Self::file_has_extensions(archive_path, &[".tar.xz", ".txz"]) {
             return Err(anyhow::anyhow!("Not a tar.xz file"));
         }
@@ -274,16 +717,19 @@ impl Extractor {
         let file = fs::File::open(archive_path).context("Failed to open tar.xz file")?;
 
         let decompressor = xz2::read::XzDecoder::new(file);
-        let mut archive = tar::Archive::new(decompressor);
+        let archive = tar::Archive::new(decompressor);
 
-        archive
-            .unpack(destination)
+        Self::unpack_tar(archive, destination, preserved)
             .context("Failed to extract tar.xz archive")?;
 
         Ok(())
     }
 
-    async fn try_extract_tar_zst(archive_path: &Path, destination: &Path) -> Result<()> {
+    fn try_extract_tar_zst(
+        archive_path: &Path,
+        destination: &Path,
+        preserved: &[PathBuf],
+    ) -> Result<()> {
         if !Self::file_has_extensions(archive_path, &[".tar.zst", ".tar.zstd"]) {
             return Err(anyhow::anyhow!("Not a tar.zst file"));
         }
@@ -294,16 +740,19 @@ impl Extractor {
 
         let decompressor =
             zstd::stream::read::Decoder::new(file).context("Failed to create zstd decoder")?;
-        let mut archive = tar::Archive::new(decompressor);
+        let archive = tar::Archive::new(decompressor);
 
-        archive
-            .unpack(destination)
+        Self::unpack_tar(archive, destination, preserved)
             .context("Failed to extract tar.zst archive")?;
 
         Ok(())
     }
 
-    async fn try_extract_tar(archive_path: &Path, destination: &Path) -> Result<()> {
+    fn try_extract_tar(
+        archive_path: &Path,
+        destination: &Path,
+        preserved: &[PathBuf],
+    ) -> Result<()> {
         if !Self::file_has_extensions(archive_path, &[".tar"]) {
             return Err(anyhow::anyhow!("Not a tar file"));
         }
@@ -312,16 +761,15 @@ impl Extractor {
 
         let file = fs::File::open(archive_path).context("Failed to open tar file")?;
 
-        let mut archive = tar::Archive::new(file);
+        let archive = tar::Archive::new(file);
 
-        archive
-            .unpack(destination)
+        Self::unpack_tar(archive, destination, preserved)
             .context("Failed to extract tar archive")?;
 
         Ok(())
     }
 
-    async fn try_extract_gz(archive_path: &Path, destination: &Path) -> Result<()> {
+    fn try_extract_gz(archive_path: &Path, destination: &Path) -> Result<()> {
         if !Self::file_has_extensions(archive_path, &[".gz"])
             || Self::file_has_extensions(archive_path, &[".tar.gz", ".tgz"])
         {
@@ -350,7 +798,7 @@ impl Extractor {
         Ok(())
     }
 
-    async fn try_extract_bz2(archive_path: &Path, destination: &Path) -> Result<()> {
+    fn try_extract_bz2(archive_path: &Path, destination: &Path) -> Result<()> {
         if !Self::file_has_extensions(archive_path, &[".bz2"])
             || Self::file_has_extensions(archive_path, &[".tar.bz2", ".tbz2", ".tbz"])
         {
@@ -379,7 +827,7 @@ impl Extractor {
         Ok(())
     }
 
-    async fn try_extract_xz(archive_path: &Path, destination: &Path) -> Result<()> {
+    fn try_extract_xz(archive_path: &Path, destination: &Path) -> Result<()> {
         if !Self::file_has_extensions(archive_path, &[".xz"])
             || Self::file_has_extensions(archive_path, &[".tar.xz", ".txz"])
         {
@@ -408,7 +856,7 @@ impl Extractor {
         Ok(())
     }
 
-    async fn try_extract_zst(archive_path: &Path, destination: &Path) -> Result<()> {
+    fn try_extract_zst(archive_path: &Path, destination: &Path) -> Result<()> {
         // More permissive check - try zst extraction if file has zst extension
         if !Self::file_has_extensions(archive_path, &[".zst", ".zstd"]) {
             return Err(anyhow::anyhow!("Not a zst file"));
@@ -455,6 +903,60 @@ impl Extractor {
         Ok(())
     }
 
+    fn save_manifest(manifest: &InstallManifest, destination: &Path) {
+        if let Err(e) = manifest.save(destination) {
+            println!("Warning: Failed to save install manifest: {}", e);
+        }
+    }
+
+    fn unpack_tar<R: Read>(
+        mut archive: tar::Archive<R>,
+        destination: &Path,
+        preserved: &[PathBuf],
+    ) -> Result<()> {
+        if preserved.is_empty() {
+            archive.unpack(destination)?;
+            return Ok(());
+        }
+
+        for entry in archive.entries()? {
+            let mut entry = entry?;
+            let outpath = destination.join(entry.path()?);
+            if Self::is_preserved(&outpath, preserved) {
+                continue;
+            }
+            entry.unpack_in(destination)?;
+        }
+
+        Ok(())
+    }
+
+    /// True when `path` is existing user data inside one of the preserved folders
+    fn is_preserved(path: &Path, preserved: &[PathBuf]) -> bool {
+        preserved
+            .iter()
+            .any(|dir| Self::path_starts_with(path, dir))
+            && fs::symlink_metadata(path).is_ok()
+    }
+
+    /// `Path::starts_with`, except that on Windows components are compared ignoring ASCII
+    /// case like the filesystem does, so `makeplace/custom/...` still falls under `Makeplace/Custom`
+    fn path_starts_with(path: &Path, prefix: &Path) -> bool {
+        if !cfg!(windows) {
+            return path.starts_with(prefix);
+        }
+
+        let mut components = path.components();
+        prefix.components().all(|expected| {
+            components.next().map_or(false, |actual| {
+                actual
+                    .as_os_str()
+                    .to_string_lossy()
+                    .eq_ignore_ascii_case(&expected.as_os_str().to_string_lossy())
+            })
+        })
+    }
+
     fn file_has_extensions(path: &Path, extensions: &[&str]) -> bool {
         let file_name = path.file_name().and_then(|n| n.to_str()).unwrap_or("");
 
@@ -477,3 +979,173 @@ impl Extractor {
         }
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    const SLT_LISTING: &str = "\
+7-Zip 23.01 (x64) : Copyright (c) 1999-2023 Igor Pavlov : 2023-06-20
+
+Listing archive: update.7z
+
+--
+Path = update.7z
+Type = 7z
+Physical Size = 1024
+Solid = +
+Blocks = 1
+
+----------
+Path = Makeplace
+Size = 0
+Packed Size = 0
+Attributes = D....
+CRC = 
+Encrypted = -
+
+Path = Makeplace/Makeplace.exe
+Size = 5
+Packed Size = 512
+Attributes = ....A
+CRC = 3610A686
+Encrypted = -
+Method = LZMA2:24
+Block = 0
+
+Path = Makeplace/empty.txt
+Size = 0
+Packed Size = 0
+Attributes = ....A
+CRC =
+Encrypted = -
+";
+
+    #[test]
+    fn test_parse_7z_listing() {
+        let entries = Extractor::parse_7z_listing(SLT_LISTING);
+
+        assert_eq!(
+            entries,
+            vec![
+                SevenZipEntry {
+                    name: "Makeplace".to_string(),
+                    size: 0,
+                    crc: None,
+                    is_directory: true,
+                },
+                SevenZipEntry {
+                    name: "Makeplace/Makeplace.exe".to_string(),
+                    size: 5,
+                    crc: Some(0x3610A686),
+                    is_directory: false,
+                },
+                SevenZipEntry {
+                    name: "Makeplace/empty.txt".to_string(),
+                    size: 0,
+                    crc: None,
+                    is_directory: false,
+                },
+            ]
+        );
+
+        // Output without an entry section yields nothing rather than the archive's own properties
+        assert!(Extractor::parse_7z_listing("Path = update.7z\nType = 7z\n").is_empty());
+    }
+
+    #[test]
+    fn test_7z_binary_records_manifest_and_skips_unchanged() {
+        // Only meaningful where a 7-Zip command line is installed
+        let Some(seven_zip) = Extractor::find_7z_binary() else {
+            return;
+        };
+
+        let root = std::env::temp_dir().join(format!("extractor_7z_cli_{}", std::process::id()));
+        let _ = fs::remove_dir_all(&root);
+        let source = root.join("source");
+        let destination = root.join("install");
+        fs::create_dir_all(source.join("Makeplace/Custom")).unwrap();
+        fs::create_dir_all(destination.join("Makeplace/Custom")).unwrap();
+        fs::write(source.join("game.txt"), b"hello").unwrap();
+        fs::write(source.join("Makeplace/Custom/user.json"), b"default").unwrap();
+        fs::write(source.join("Makeplace/Custom/new.json"), b"added").unwrap();
+        fs::write(destination.join("Makeplace/Custom/user.json"), b"mine").unwrap();
+
+        let archive = root.join("update.7z");
+        let status = Command::new(seven_zip)
+            .current_dir(&source)
+            .arg("a")
+            .arg(&archive)
+            .args(["game.txt", "Makeplace", "-bso0", "-bsp0"])
+            .status()
+            .unwrap();
+        assert!(status.success());
+
+        let preserve = ["Makeplace/Custom".to_string()];
+        Extractor::extract_archive_blocking(&archive, &destination, &preserve).unwrap();
+
+        let game = destination.join("game.txt");
+        assert_eq!(fs::read(&game).unwrap(), b"hello");
+        assert_eq!(
+            fs::read(destination.join("Makeplace/Custom/user.json")).unwrap(),
+            b"mine"
+        );
+        assert_eq!(
+            fs::read(destination.join("Makeplace/Custom/new.json")).unwrap(),
+            b"added"
+        );
+
+        let entries = Extractor::list_7z_entries(seven_zip, &archive).unwrap();
+        let game_crc = entries
+            .iter()
+            .find(|entry| entry.name == "game.txt")
+            .and_then(|entry| entry.crc)
+            .unwrap();
+
+        // The CLI path fills the manifest, but never claims the user's own copy
+        let manifest = InstallManifest::load(&destination);
+        assert!(manifest.is_unchanged("game.txt", game_crc, 5, &game));
+        let user_entry = entries
+            .iter()
+            .find(|entry| entry.name.ends_with("user.json"))
+            .unwrap();
+        assert!(!manifest.is_unchanged(
+            &user_entry.name,
+            user_entry.crc.unwrap(),
+            user_entry.size,
+            &destination.join(&user_entry.name)
+        ));
+
+        // A second install leaves the unchanged file alone and keeps it in the manifest
+        let modified = fs::metadata(&game).unwrap().modified().unwrap();
+        Extractor::extract_archive_blocking(&archive, &destination, &preserve).unwrap();
+        assert_eq!(fs::metadata(&game).unwrap().modified().unwrap(), modified);
+        assert!(InstallManifest::load(&destination).is_unchanged("game.txt", game_crc, 5, &game));
+
+        let _ = fs::remove_dir_all(&root);
+    }
+
+    #[test]
+    fn test_preserved_prefix_matching() {
+        let preserved = Path::new("Games/ReMakeplace/Makeplace/Custom");
+
+        assert!(Extractor::path_starts_with(
+            Path::new("Games/ReMakeplace/Makeplace/Custom/furniture.json"),
+            preserved
+        ));
+        assert!(!Extractor::path_starts_with(
+            Path::new("Games/ReMakeplace/Makeplace/CustomOld/furniture.json"),
+            preserved
+        ));
+
+        // Windows paths are case-insensitive, so a mixed-case archive entry still lands in
+        // the preserved folder there; elsewhere it's a different folder
+        assert_eq!(
+            Extractor::path_starts_with(
+                Path::new("Games/ReMakeplace/makeplace/CUSTOM/furniture.json"),
+                preserved
+            ),
+            cfg!(windows)
+        );
+    }
+}
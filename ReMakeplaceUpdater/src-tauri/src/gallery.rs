@@ -2,6 +2,7 @@ use anyhow::{Context, Result};
 use chrono::Utc;
 use rusqlite::{params, Connection};
 use std::path::PathBuf;
+use std::sync::atomic::{AtomicBool, Ordering};
 
 #[derive(Debug, Clone, serde::Serialize)]
 pub struct GalleryItemDto {
@@ -23,7 +24,14 @@ fn get_db_path() -> PathBuf {
     get_app_data_dir().join("gallery.db")
 }
 
+/// Set once the schema exists, so later gallery commands skip the DDL round-trip
+static DB_READY: AtomicBool = AtomicBool::new(false);
+
 pub fn init_db() -> Result<()> {
+    if DB_READY.load(Ordering::Acquire) {
+        return Ok(());
+    }
+
     let dir = get_app_data_dir();
     std::fs::create_dir_all(&dir).context("Failed to create gallery data dir")?;
     let conn = Connection::open(get_db_path()).context("Failed to open gallery DB")?;
@@ -42,6 +50,7 @@ pub fn init_db() -> Result<()> {
         "#,
     )
     .context("Failed to create table")?;
+    DB_READY.store(true, Ordering::Release);
     Ok(())
 }
 
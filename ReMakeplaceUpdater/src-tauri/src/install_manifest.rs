@@ -0,0 +1,204 @@
+use anyhow::{Context, Result};
+use serde::{Deserialize, Serialize};
+use std::collections::HashMap;
+use std::fs;
+use std::path::Path;
+use std::time::UNIX_EPOCH;
+
+/// What was written for one archive entry, and how the file looked on disk afterwards
+#[derive(Debug, Clone, Copy, PartialEq, Serialize, Deserialize)]
+pub struct ManifestEntry {
+    pub crc: u32,
+    pub size: u64,
+    pub modified: u64,
+}
+
+/// Record of the files the last update extracted, keyed by archive entry name.
+///
+/// An entry whose archive CRC matches the record, and whose installed file still has the
+/// recorded size and mtime, is already on disk and doesn't need to be written again.
+#[derive(Debug, Default, Serialize, Deserialize)]
+pub struct InstallManifest {
+    files: HashMap<String, ManifestEntry>,
+}
+
+impl InstallManifest {
+    const FILE_NAME: &'static str = ".updater_manifest.json";
+
+    pub fn load(destination: &Path) -> Self {
+        fs::read(destination.join(Self::FILE_NAME))
+            .ok()
+            .and_then(|content| serde_json::from_slice(&content).ok())
+            .unwrap_or_default()
+    }
+
+    pub fn save(&self, destination: &Path) -> Result<()> {
+        let content = serde_json::to_vec(self).context("Failed to serialize install manifest")?;
+        fs::write(destination.join(Self::FILE_NAME), content)
+            .context("Failed to write install manifest")?;
+        Ok(())
+    }
+
+    /// True when `path` still holds exactly what the archive entry would write
+    pub fn is_unchanged(&self, name: &str, crc: u32, size: u64, path: &Path) -> bool {
+        let Some(recorded) = self.files.get(&Self::key(name)) else {
+            return false;
+        };
+
+        recorded.crc == crc
+            && recorded.size == size
+            && Self::stat(path).map_or(false, |(len, modified)| {
+                len == recorded.size && modified == recorded.modified
+            })
+    }
+
+    /// Records the file at `path` as the installed copy of the archive entry
+    pub fn record(&mut self, name: &str, crc: u32, path: &Path) {
+        if let Some((size, modified)) = Self::stat(path) {
+            self.files.insert(
+                Self::key(name),
+                ManifestEntry {
+                    crc,
+                    size,
+                    modified,
+                },
+            );
+        }
+    }
+
+    /// Folds in entries recorded by another extraction worker
+    pub fn merge(&mut self, other: InstallManifest) {
+        self.files.extend(other.files);
+    }
+
+    /// The 7z CLI lists names with the host's separator while archive libraries use '/';
+    /// store one form so either extractor finds what the other recorded
+    fn key(name: &str) -> String {
+        name.replace('\\', "/")
+    }
+
+    fn stat(path: &Path) -> Option<(u64, u64)> {
+        let metadata = fs::metadata(path).ok()?;
+        let modified = metadata
+            .modified()
+            .ok()?
+            .duration_since(UNIX_EPOCH)
+            .ok()?
+            .as_nanos() as u64;
+        Some((metadata.len(), modified))
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::path::PathBuf;
+
+    fn test_dir(name: &str) -> PathBuf {
+        let dir =
+            std::env::temp_dir().join(format!("install_manifest_{}_{}", name, std::process::id()));
+        let _ = fs::remove_dir_all(&dir);
+        fs::create_dir_all(&dir).unwrap();
+        dir
+    }
+
+    #[test]
+    fn test_recorded_file_is_unchanged() {
+        let dir = test_dir("recorded");
+        let path = dir.join("game.dll");
+        fs::write(&path, b"contents").unwrap();
+
+        let mut manifest = InstallManifest::default();
+        manifest.record("game.dll", 0x1234, &path);
+
+        assert!(manifest.is_unchanged("game.dll", 0x1234, 8, &path));
+        let _ = fs::remove_dir_all(&dir);
+    }
+
+    #[test]
+    fn test_crc_mismatch_is_changed() {
+        let dir = test_dir("crc");
+        let path = dir.join("game.dll");
+        fs::write(&path, b"contents").unwrap();
+
+        let mut manifest = InstallManifest::default();
+        manifest.record("game.dll", 0x1234, &path);
+
+        assert!(!manifest.is_unchanged("game.dll", 0x4321, 8, &path));
+        assert!(!manifest.is_unchanged("other.dll", 0x1234, 8, &path));
+        let _ = fs::remove_dir_all(&dir);
+    }
+
+    #[test]
+    fn test_names_match_across_separators() {
+        let dir = test_dir("separators");
+        let path = dir.join("game.dll");
+        fs::write(&path, b"contents").unwrap();
+
+        let mut manifest = InstallManifest::default();
+        manifest.record("Data\\game.dll", 0x1234, &path);
+
+        assert!(manifest.is_unchanged("Data/game.dll", 0x1234, 8, &path));
+        let _ = fs::remove_dir_all(&dir);
+    }
+
+    #[test]
+    fn test_changed_size_or_mtime_is_changed() {
+        let dir = test_dir("stat");
+        let path = dir.join("game.dll");
+        fs::write(&path, b"contents").unwrap();
+
+        let mut manifest = InstallManifest::default();
+        manifest.record("game.dll", 0x1234, &path);
+
+        // The archive entry's size no longer matches the record
+        assert!(!manifest.is_unchanged("game.dll", 0x1234, 9, &path));
+
+        // The file on disk was modified after it was recorded
+        manifest.files.get_mut("game.dll").unwrap().modified -= 1;
+        assert!(!manifest.is_unchanged("game.dll", 0x1234, 8, &path));
+
+        // The file on disk was rewritten with a different length
+        manifest.record("game.dll", 0x1234, &path);
+        fs::write(&path, b"longer contents").unwrap();
+        assert!(!manifest.is_unchanged("game.dll", 0x1234, 8, &path));
+        let _ = fs::remove_dir_all(&dir);
+    }
+
+    #[test]
+    fn test_missing_file_is_changed() {
+        let dir = test_dir("missing");
+        let path = dir.join("game.dll");
+        fs::write(&path, b"contents").unwrap();
+
+        let mut manifest = InstallManifest::default();
+        manifest.record("game.dll", 0x1234, &path);
+        fs::remove_file(&path).unwrap();
+
+        assert!(!manifest.is_unchanged("game.dll", 0x1234, 8, &path));
+
+        // Nothing is recorded for a file that doesn't exist
+        manifest.record("absent.dll", 0x1234, &dir.join("absent.dll"));
+        assert!(!manifest.files.contains_key("absent.dll"));
+        let _ = fs::remove_dir_all(&dir);
+    }
+
+    #[test]
+    fn test_load_round_trip_and_corrupt_manifest() {
+        let dir = test_dir("load");
+        let path = dir.join("game.dll");
+        fs::write(&path, b"contents").unwrap();
+
+        let mut manifest = InstallManifest::default();
+        manifest.record("game.dll", 0x1234, &path);
+        manifest.save(&dir).unwrap();
+        assert!(InstallManifest::load(&dir).is_unchanged("game.dll", 0x1234, 8, &path));
+
+        // A corrupt manifest is treated as empty, so every entry gets extracted again
+        fs::write(dir.join(InstallManifest::FILE_NAME), b"{not json").unwrap();
+        let loaded = InstallManifest::load(&dir);
+        assert!(loaded.files.is_empty());
+        assert!(!loaded.is_unchanged("game.dll", 0x1234, 8, &path));
+        let _ = fs::remove_dir_all(&dir);
+    }
+}
@@ -1,71 +1,56 @@
-use anyhow::{Context, Result};
+use anyhow::Result;
+use std::io::ErrorKind;
 use std::path::Path;
-use std::process::Command;
+use std::process::{Command, Stdio};
 
 pub struct Launcher;
 
 impl Launcher {
-    pub async fn launch_game(installation_path: &Path, exe_name: &str) -> Result<()> {
-        let exe_path = installation_path.join(exe_name);
-
-        if !Self::validate_executable(&exe_path)? {
-            return Err(anyhow::anyhow!(
-                "Executable not found: {}",
-                exe_path.display()
-            ));
-        }
-
-        // Launch the game as a detached process
-        let mut command = Command::new(&exe_path);
-        command.current_dir(installation_path);
-
-        // On Windows, we can use CREATE_NEW_PROCESS_GROUP to detach
+    pub async fn launch_game(exe_path: &Path, working_dir: &Path) -> Result<()> {
+        // Launch the game as a detached process that doesn't inherit our stdio handles
+        let mut command = Command::new(exe_path);
+        command
+            .current_dir(working_dir)
+            .stdin(Stdio::null())
+            .stdout(Stdio::null())
+            .stderr(Stdio::null());
+
+        // On Windows, detach from our console and process group, and leave our job object
+        // so closing the updater never takes the game with it
         #[cfg(windows)]
-        {
+        let spawned = {
             use std::os::windows::process::CommandExt;
-            command.creation_flags(0x00000200); // CREATE_NEW_PROCESS_GROUP
-        }
-
-        // Spawn the process without waiting for it to complete
-        let child = command
-            .spawn()
-            .context("Failed to launch game executable")?;
+            const DETACHED_PROCESS: u32 = 0x00000008;
+            const CREATE_NEW_PROCESS_GROUP: u32 = 0x00000200;
+            const CREATE_BREAKAWAY_FROM_JOB: u32 = 0x01000000;
+
+            let detached = DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP;
+            command.creation_flags(detached | CREATE_BREAKAWAY_FROM_JOB);
+            match command.spawn() {
+                Err(e) if e.kind() != std::io::ErrorKind::NotFound => {
+                    // Breakaway is refused when our job doesn't allow it; launch detached anyway
+                    command.creation_flags(detached).spawn()
+                }
+                result => result,
+            }
+        };
+
+        #[cfg(not(windows))]
+        let spawned = command.spawn();
+
+        // Spawning reports a missing or non-executable file itself, so there's no separate
+        // existence check that could race with it
+        let child = spawned.map_err(|e| match e.kind() {
+            ErrorKind::NotFound => anyhow::anyhow!("Executable not found: {}", exe_path.display()),
+            ErrorKind::PermissionDenied => {
+                anyhow::anyhow!("Executable is not runnable: {} ({})", exe_path.display(), e)
+            }
+            _ => anyhow::Error::new(e).context("Failed to launch game executable"),
+        })?;
 
         // Log the process ID for reference
         println!("Game launched with PID: {}", child.id());
 
         Ok(())
     }
-
-    pub fn validate_executable(exe_path: &Path) -> Result<bool> {
-        if !exe_path.exists() {
-            return Ok(false);
-        }
-
-        if !exe_path.is_file() {
-            return Ok(false);
-        }
-
-        // Additional validation: check if it's actually executable
-        #[cfg(unix)]
-        {
-            use std::os::unix::fs::PermissionsExt;
-            let metadata =
-                std::fs::metadata(exe_path).context("Failed to get executable metadata")?;
-            let permissions = metadata.permissions();
-
-            // Check if owner has execute permission
-            Ok(permissions.mode() & 0o100 != 0)
-        }
-
-        #[cfg(windows)]
-        {
-            // On Windows, check if it's a .exe file
-            Ok(exe_path
-                .extension()
-                .and_then(|ext| ext.to_str())
-                .map(|ext| ext.to_lowercase() == "exe")
-                .unwrap_or(false))
-        }
-    }
 }
@@ -18,6 +18,7 @@ mod config;
 mod updater;
 pub mod downloader;
 mod extractor;
+mod install_manifest;
 mod launcher;
 mod retry_manager;
 mod error_handler;
@@ -50,7 +51,8 @@ impl AppState {
 
 #[tauri::command]
 async fn load_config() -> Result<Config, String> {
-    ConfigManager::load_config().map_err(|e| e.to_string())
+    let config = ConfigManager::load_config().map_err(|e| e.to_string())?;
+    Ok(finish_interrupted_update(config).await)
 }
 
 #[tauri::command]
@@ -121,35 +123,31 @@ async fn start_download(
 
     let cache_dir = Downloader::get_cache_directory();
     let filepath = Downloader::get_cache_filepath(&cache_dir, &version, &original_filename);
+    // Returned to the frontend and sent with download-complete; convert it once
+    let filepath_string = filepath.to_string_lossy().into_owned();
+
+    // Check if file already exists in cache and validate it. Only completed downloads are
+    // stored under this name; interrupted ones are resumed from their .part file.
+    // validate_cached_file treats a missing file as invalid, so no separate exists() probe.
+    if let Ok(true) = Downloader::validate_cached_file(&filepath, None) {
+        println!("Found valid cached file: {}", filepath.display());
+        // Reset download state since we're using cached file
+        state.lock().await.is_downloading = false;
+        return Ok(filepath_string);
+    }
 
-    // Check if file already exists in cache and validate it
-    let mut resume_download = false;
-    if filepath.exists() {
-        match Downloader::validate_cached_file(&filepath, None) {
-            Ok(true) => {
-                println!("Found valid cached file: {}", filepath.display());
-                // Reset download state since we're using cached file
-                state.lock().await.is_downloading = false;
-                return Ok(filepath.to_string_lossy().to_string());
-            }
-            Ok(false) => {
-                println!("Found invalid cached file, will attempt to resume: {}", filepath.display());
-                resume_download = true;
-            }
-            Err(e) => {
-                println!("Error validating cached file: {}, removing and redownloading", e);
-                if let Err(remove_err) = std::fs::remove_file(&filepath) {
-                    println!("Warning: Failed to remove invalid cache file: {}", remove_err);
-                    // Continue with download anyway
-                }
-            }
-        }
+    match std::fs::remove_file(&filepath) {
+        Ok(()) => println!("Removed invalid cached file, redownloading: {}", filepath.display()),
+        Err(e) if e.kind() == std::io::ErrorKind::NotFound => {}
+        // Continue with download anyway
+        Err(e) => println!("Warning: Failed to remove invalid cache file: {}", e),
     }
 
     let app_handle_progress = app_handle.clone();
     let app_handle_complete = app_handle.clone();
     let app_handle_error = app_handle;
     let filepath_clone = filepath.clone();
+    let filepath_string_clone = filepath_string.clone();
     let state_clone = state.inner().clone();
 
     tokio::spawn(async move {
@@ -157,7 +155,7 @@ async fn start_download(
             let _ = app_handle_progress.emit("download-progress", &progress);
         };
 
-        let download_result = Downloader::download_file_with_resume(&url, &filepath_clone, resume_download, progress_callback).await;
+        let download_result = Downloader::download_file_with_resume(&url, &filepath_clone, false, progress_callback).await;
         
         // Always reset download state when done
         state_clone.lock().await.is_downloading = false;
@@ -167,7 +165,7 @@ async fn start_download(
                 // Validate the completed download
                 match Downloader::validate_cached_file(&filepath_clone, None) {
                     Ok(true) => {
-                        let _ = app_handle_complete.emit("download-complete", &filepath_clone.to_string_lossy().to_string());
+                        let _ = app_handle_complete.emit("download-complete", &filepath_string_clone);
                     }
                     Ok(false) => {
                         // Remove invalid file
@@ -188,37 +186,46 @@ async fn start_download(
         }
     });
 
-    Ok(filepath.to_string_lossy().to_string())
+    Ok(filepath_string)
 }
 
 #[tauri::command]
 async fn install_update(
     archive_path: String,
+    version: String,
     config: Config,
     app_handle: tauri::AppHandle,
 ) -> Result<(), String> {
     let archive_path = PathBuf::from(archive_path);
-    let installation_path = PathBuf::from(&config.installation_path);
+    let installation_path = config.installation_dir();
 
     tokio::spawn(async move {
         let _ = app_handle.emit("status-update", "Starting installation...");
 
-        // Only backup user data if this is an update (not fresh install)
+        // Only preserve user data if this is an update (not fresh install)
+        let preserve_folders: &[String] = if config.installation_mode == InstallationMode::Update {
+            &config.preserve_folders
+        } else {
+            &[]
+        };
+
         if config.installation_mode == InstallationMode::Update {
             let _ = app_handle.emit("status-update", "Backing up user data...");
-            if let Err(e) = backup_user_data(&installation_path, &config.preserve_folders).await {
+            if let Err(e) = backup_user_data(&installation_path).await {
                 let _ = app_handle.emit("error", &format!("Backup failed: {}", e));
                 return;
             }
         }
 
-        // Extract archive
+        // Extract archive; existing files in the preserved folders are skipped rather than backed up
         let _ = app_handle.emit("status-update", "Extracting files...");
-        if let Err(e) = Extractor::extract_archive(&archive_path, &installation_path).await {
+        if let Err(e) =
+            Extractor::extract_archive(&archive_path, &installation_path, preserve_folders).await
+        {
             let _ = app_handle.emit("error", &format!("Extraction failed: {}", e));
             // Try to restore backup if this was an update
             if config.installation_mode == InstallationMode::Update {
-                let _ = restore_user_data(&installation_path, &config.preserve_folders).await;
+                let _ = restore_user_data(&installation_path).await;
             }
             return;
         }
@@ -226,32 +233,57 @@ async fn install_update(
         // Restore user data if this was an update
         if config.installation_mode == InstallationMode::Update {
             let _ = app_handle.emit("status-update", "Restoring user data...");
-            if let Err(e) = restore_user_data(&installation_path, &config.preserve_folders).await {
+            if let Err(e) = restore_user_data(&installation_path).await {
                 let _ = app_handle.emit("error", &format!("Failed to restore user data: {}", e));
                 return;
             }
         }
 
-        // Update config with new version
-        let mut updated_config = config.clone();
-        if let Ok(update_info) = UpdateManager::check_for_updates(&config).await {
-            updated_config.current_version = update_info.latest_version;
+        // Mark the files as applied before touching the config, so a crash from here on is
+        // finished at the next start instead of downloading the update again
+        let cache_dir = Downloader::get_cache_directory();
+        if let Err(e) = Downloader::write_applied_marker(&cache_dir, &version) {
+            println!("Failed to write applied-update marker: {}", e);
         }
+
+        // Record the version that was just installed; the frontend already knows it from the
+        // update check, so there's no need to ask GitHub again
+        let mut updated_config = config.clone();
+        updated_config.current_version = version;
         updated_config.last_check = chrono::Utc::now().to_rfc3339();
+        // The installation now holds the game, so the next run is an update either way
+        updated_config.installation_mode = InstallationMode::Update;
         
         if let Err(e) = ConfigManager::save_config(&updated_config) {
             let _ = app_handle.emit("error", &format!("Failed to update config: {}", e));
             return;
         }
 
-        // Clean up
+        // Clean up; this also removes the applied-update marker
         let _ = app_handle.emit("status-update", "Cleaning up...");
-        let cache_dir = Downloader::get_cache_directory();
-        let _ = Downloader::manage_cache(&cache_dir, false);
-        let _ = cleanup_temp_backup().await;
-
-        let _ = app_handle.emit("status-update", "Update completed successfully!");
-        let _ = app_handle.emit("update-complete", ());
+        // Deleting a large archive can take a while; keep it off the async worker
+        let cleanup = tokio::task::spawn_blocking(move || Downloader::wipe_cache(&cache_dir))
+            .await
+            .map_err(anyhow::Error::from)
+            .and_then(|result| result);
+        let _ = cleanup_temp_backup(&installation_path).await;
+
+        let mut completion_message = if config.installation_mode == InstallationMode::FreshInstall {
+            "Fresh installation completed successfully!".to_string()
+        } else {
+            "Update completed successfully!".to_string()
+        };
+        // A stale cache doesn't affect the installed update, so surface it as a note, not an error
+        if let Err(e) = cleanup {
+            println!("Cache cleanup failed: {}", e);
+            completion_message.push_str(" (Cache cleanup skipped; use Clear Cache to retry)");
+        }
+        // One event carries the final status and the saved config, so the UI settles in a
+        // single update without reloading the config or checking for updates again
+        let _ = app_handle.emit("update-complete", &serde_json::json!({
+            "message": completion_message,
+            "config": updated_config,
+        }));
     });
 
     Ok(())
@@ -259,9 +291,7 @@ async fn install_update(
 
 #[tauri::command]
 async fn launch_game(config: Config) -> Result<(), String> {
-    let installation_path = PathBuf::from(&config.installation_path);
-    
-    Launcher::launch_game(&installation_path, &config.exe_path)
+    Launcher::launch_game(&config.executable_path(), &config.installation_dir())
         .await
         .map_err(|e| e.to_string())
 }
@@ -293,7 +323,9 @@ async fn clear_cache() -> Result<(), String> {
     let cache_dir = Downloader::get_cache_directory();
     
     if cache_dir.exists() {
-        Downloader::manage_cache(&cache_dir, false)
+        tokio::task::spawn_blocking(move || Downloader::wipe_cache(&cache_dir))
+            .await
+            .map_err(|e| format!("Failed to clear cache: {}", e))?
             .map_err(|e| format!("Failed to clear cache: {}", e))?;
         
         println!("Cache cleared successfully");
@@ -310,53 +342,70 @@ async fn get_cache_path(version: String, original_filename: String) -> Result<St
     Ok(filepath.to_string_lossy().to_string())
 }
 
-// Helper functions for data preservation
-
-async fn backup_user_data(installation_path: &Path, preserve_folders: &[String]) -> Result<(), anyhow::Error> {
-    let backup_dir = PathBuf::from("temp_backup");
-    std::fs::create_dir_all(&backup_dir)?;
+/// Completes an update whose files were extracted but whose config save or cache cleanup
+/// never ran, e.g. because the app was closed mid-install
+async fn finish_interrupted_update(mut config: Config) -> Config {
+    let cache_dir = Downloader::get_cache_directory();
+    let Some(version) = Downloader::applied_marker_version(&cache_dir) else {
+        return config;
+    };
 
-    for folder in preserve_folders {
-        let source = installation_path.join(folder);
-        if source.exists() {
-            let dest = backup_dir.join(folder);
-            if let Some(parent) = dest.parent() {
-                std::fs::create_dir_all(parent)?;
-            }
-            copy_dir_all(&source, &dest)?;
+    if config.current_version != version {
+        let mut recovered = config.clone();
+        recovered.current_version = version;
+        recovered.installation_mode = InstallationMode::Update;
+        if let Err(e) = ConfigManager::save_config(&recovered) {
+            // Keep the marker so the next start tries again
+            println!("Failed to record interrupted update: {}", e);
+            return config;
         }
+        config = recovered;
     }
 
-    // Also backup config.json if it exists in installation directory
+    // Removing the cache also removes the marker
+    let cleanup = tokio::task::spawn_blocking(move || Downloader::wipe_cache(&cache_dir)).await;
+    if let Ok(Err(e)) = cleanup {
+        println!("Cache cleanup failed: {}", e);
+    }
+
+    config
+}
+
+// Helper functions for data preservation
+
+// Preserved folders are never overwritten during extraction, so only config.json needs a backup
+
+/// Backups live inside the installation so moving files in and out is a same-volume rename
+fn backup_directory(installation_path: &Path) -> PathBuf {
+    installation_path.join(".updater_backup")
+}
+
+async fn backup_user_data(installation_path: &Path) -> Result<(), anyhow::Error> {
+    let backup_dir = backup_directory(installation_path);
+    std::fs::create_dir_all(&backup_dir)?;
+
+    // Backup config.json if it exists in installation directory
     let config_source = installation_path.join("config.json");
     if config_source.exists() {
         let config_dest = backup_dir.join("config.json");
-        std::fs::copy(&config_source, &config_dest)?;
+        // The update ships its own config.json, so the user's copy can be moved aside rather than copied.
+        // Don't hardlink instead: the extractors truncate existing files in place, which would clobber the backup.
+        if std::fs::rename(&config_source, &config_dest).is_err() {
+            std::fs::copy(&config_source, &config_dest)?;
+        }
         println!("Backed up MakePlace config.json from: {}", config_source.display());
     }
 
     Ok(())
 }
 
-async fn restore_user_data(installation_path: &Path, preserve_folders: &[String]) -> Result<(), anyhow::Error> {
-    let backup_dir = PathBuf::from("temp_backup");
+async fn restore_user_data(installation_path: &Path) -> Result<(), anyhow::Error> {
+    let backup_dir = backup_directory(installation_path);
 
     if !backup_dir.exists() {
         return Ok(()); // Nothing to restore
     }
 
-    for folder in preserve_folders {
-        let source = backup_dir.join(folder);
-        let dest = installation_path.join(folder);
-        
-        if source.exists() {
-            if let Some(parent) = dest.parent() {
-                std::fs::create_dir_all(parent)?;
-            }
-            copy_dir_all(&source, &dest)?;
-        }
-    }
-
     // Smart restore config.json with merging
     let config_source = backup_dir.join("config.json");
     let config_dest = installation_path.join("config.json");
@@ -364,8 +413,10 @@ async fn restore_user_data(installation_path: &Path, preserve_folders: &[String]
     if config_source.exists() {
         if let Err(e) = merge_config_files(&config_source, &config_dest).await {
             println!("Config merge failed, falling back to simple restore: {}", e);
-            // Fallback to simple copy if merge fails
-            std::fs::copy(&config_source, &config_dest)?;
+            // Fallback to simple restore if merge fails
+            if std::fs::rename(&config_source, &config_dest).is_err() {
+                std::fs::copy(&config_source, &config_dest)?;
+            }
         }
         println!("Restored MakePlace config.json to: {}", config_dest.display());
     }
@@ -376,16 +427,16 @@ async fn restore_user_data(installation_path: &Path, preserve_folders: &[String]
 /// Smart config.json merging that preserves user settings while adding new options
 async fn merge_config_files(backup_config: &Path, new_config: &Path) -> Result<(), anyhow::Error> {
     // Read the backed up (user) config
-    let user_config_content = std::fs::read_to_string(backup_config)
+    let user_config_content = std::fs::read(backup_config)
         .context("Failed to read user config.json")?;
-    let mut user_config: serde_json::Value = serde_json::from_str(&user_config_content)
+    let mut user_config: serde_json::Value = serde_json::from_slice(&user_config_content)
         .context("Failed to parse user config.json")?;
 
     // Read the new (from update) config if it exists
     if new_config.exists() {
-        let new_config_content = std::fs::read_to_string(new_config)
+        let new_config_content = std::fs::read(new_config)
             .context("Failed to read new config.json")?;
-        let new_config_json: serde_json::Value = serde_json::from_str(&new_config_content)
+        let new_config_json: serde_json::Value = serde_json::from_slice(&new_config_content)
             .context("Failed to parse new config.json")?;
 
         // Merge: Add new keys from the update, preserve existing user values
@@ -402,7 +453,7 @@ async fn merge_config_files(backup_config: &Path, new_config: &Path) -> Result<(
     }
 
     // Write the merged config back
-    let merged_content = serde_json::to_string_pretty(&user_config)
+    let merged_content = serde_json::to_vec_pretty(&user_config)
         .context("Failed to serialize merged config")?;
     std::fs::write(new_config, merged_content)
         .context("Failed to write merged config.json")?;
@@ -411,31 +462,14 @@ async fn merge_config_files(backup_config: &Path, new_config: &Path) -> Result<(
     Ok(())
 }
 
-async fn cleanup_temp_backup() -> Result<(), anyhow::Error> {
-    let backup_dir = PathBuf::from("temp_backup");
+async fn cleanup_temp_backup(installation_path: &Path) -> Result<(), anyhow::Error> {
+    let backup_dir = backup_directory(installation_path);
     if backup_dir.exists() {
         std::fs::remove_dir_all(&backup_dir)?;
     }
     Ok(())
 }
 
-fn copy_dir_all(src: &Path, dst: &Path) -> std::io::Result<()> {
-    std::fs::create_dir_all(dst)?;
-    
-    for entry in std::fs::read_dir(src)? {
-        let entry = entry?;
-        let ty = entry.file_type()?;
-        
-        if ty.is_dir() {
-            copy_dir_all(&entry.path(), &dst.join(entry.file_name()))?;
-        } else {
-            std::fs::copy(entry.path(), dst.join(entry.file_name()))?;
-        }
-    }
-    
-    Ok(())
-}
-
 #[cfg_attr(mobile, tauri::mobile_entry_point)]
 pub fn run() {
     let app_state = AppState::new();
@@ -466,8 +500,6 @@ pub fn run() {
         .plugin(tauri_plugin_notification::init())
         .plugin(tauri_plugin_shell::init())
         .plugin(tauri_plugin_dialog::init())
-        .plugin(tauri_plugin_http::init())
-        .plugin(tauri_plugin_fs::init())
         .plugin(tauri_plugin_opener::init())
         .setup(|app| {
             #[cfg(any(target_os = "linux", target_os = "windows"))]
@@ -1,6 +1,8 @@
 use crate::config::Config;
+use crate::downloader::Downloader;
 use anyhow::{Context, Result};
 use serde::{Deserialize, Serialize};
+use std::cmp::Ordering;
 
 #[derive(Debug, Clone, Serialize, Deserialize)]
 pub struct UpdateInfo {
@@ -44,6 +46,11 @@ impl UpdateManager {
     }
 
     pub fn compare_versions(current: &str, latest: &str) -> Result<bool> {
+        // Release tags are almost always plain dotted numbers; compare those without allocating
+        if let Some(ordering) = Self::compare_numeric_versions(current, latest) {
+            return Ok(ordering == Ordering::Less);
+        }
+
         let current_version =
             semver::Version::parse(current).context("Failed to parse current version")?;
         let latest_version =
@@ -52,8 +59,31 @@ impl UpdateManager {
         Ok(latest_version > current_version)
     }
 
+    /// Compares dotted-decimal versions component by component, treating missing components
+    /// as zero. Returns None when either side has a non-numeric component.
+    fn compare_numeric_versions(current: &str, latest: &str) -> Option<Ordering> {
+        let mut current_parts = current.split('.');
+        let mut latest_parts = latest.split('.');
+
+        loop {
+            let (a, b) = match (current_parts.next(), latest_parts.next()) {
+                (None, None) => return Some(Ordering::Equal),
+                (a, b) => (a.unwrap_or("0"), b.unwrap_or("0")),
+            };
+
+            let ordering = a.parse::<u64>().ok()?.cmp(&b.parse::<u64>().ok()?);
+            if ordering != Ordering::Equal {
+                // Later components still have to be valid for the fast path to apply
+                let rest_valid = current_parts
+                    .chain(latest_parts)
+                    .all(|part| part.parse::<u64>().is_ok());
+                return rest_valid.then_some(ordering);
+            }
+        }
+    }
+
     async fn get_latest_release(url: &str) -> Result<GitHubRelease> {
-        let client = reqwest::Client::new();
+        let client = Downloader::http_client()?;
         let response = client
             .get(url)
             .header("User-Agent", "ReMakeplace-Updater")
@@ -117,3 +147,27 @@ impl UpdateManager {
         None
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_compare_versions_numeric_fast_path() {
+        assert!(UpdateManager::compare_versions("1.2.3", "1.2.4").unwrap());
+        assert!(UpdateManager::compare_versions("1.9.0", "1.10.0").unwrap());
+        assert!(!UpdateManager::compare_versions("2.0.0", "1.99.99").unwrap());
+        assert!(!UpdateManager::compare_versions("1.2.3", "1.2.3").unwrap());
+        assert!(!UpdateManager::compare_versions("1.2", "1.2.0").unwrap());
+    }
+
+    #[test]
+    fn test_compare_versions_falls_back_to_semver() {
+        assert_eq!(
+            UpdateManager::compare_numeric_versions("1.0.0-beta", "1.0.0"),
+            None
+        );
+        assert!(UpdateManager::compare_versions("1.0.0-beta", "1.0.0").unwrap());
+        assert!(UpdateManager::compare_versions("not-a-version", "1.0.0").is_err());
+    }
+}
@@ -1,7 +1,6 @@
 import { invoke, convertFileSrc } from "@tauri-apps/api/core";
 import { listen } from "@tauri-apps/api/event";
-import { onOpenUrl } from "@tauri-apps/plugin-deep-link";
-import type { Config, UpdateInfo, ProgressInfo, AppStatus, InstallationMode, ErrorInfo, Metadata } from "./types";
+import type { Config, UpdateInfo, UpdateComplete, ProgressInfo, AppStatus, InstallationMode, ErrorInfo, Metadata } from "./types";
 import { AppState, ErrorCategory } from "./types";
 
 class ReMakeplaceUpdater {
@@ -13,6 +12,10 @@ class ReMakeplaceUpdater {
   };
   private isFirstRun = false;
   private metadata: Metadata | null = null;
+  private pendingProgress: ProgressInfo | null = null;
+  private pathValidationTimer: number | undefined;
+  private pathValidationRequest = 0;
+  private progressVisible = false;
 
   // UI Elements
   private statusMessage!: HTMLElement;
@@ -20,6 +23,7 @@ class ReMakeplaceUpdater {
   private latestVersionElement!: HTMLElement;
   private installationPathElement!: HTMLElement;
   private progressBar!: HTMLElement;
+  private progressFill!: HTMLElement;
   private progressText!: HTMLElement;
   private updateButton!: HTMLButtonElement;
   private launchButton!: HTMLButtonElement;
@@ -184,6 +188,7 @@ class ReMakeplaceUpdater {
     this.latestVersionElement = document.getElementById("latest-version")!;
     this.installationPathElement = document.getElementById("installation-path")!;
     this.progressBar = document.getElementById("progress-bar")!;
+    this.progressFill = this.progressBar.querySelector(".progress-fill") as HTMLElement;
     this.progressText = document.getElementById("progress-text")!;
     this.updateButton = document.getElementById("update-btn") as HTMLButtonElement;
     this.launchButton = document.getElementById("launch-btn") as HTMLButtonElement;
@@ -273,7 +278,7 @@ class ReMakeplaceUpdater {
     }
     // Tauri event listeners
     listen<ProgressInfo>("download-progress", (event) => {
-      this.updateProgress(event.payload);
+      this.queueProgress(event.payload);
     });
 
     listen<string>("download-complete", () => {
@@ -300,8 +305,8 @@ class ReMakeplaceUpdater {
       }
     });
 
-    listen("update-complete", () => {
-      this.onUpdateComplete();
+    listen<UpdateComplete>("update-complete", (event) => {
+      this.onUpdateComplete(event.payload);
     });
 
     // UI event listeners
@@ -333,7 +338,7 @@ class ReMakeplaceUpdater {
     const saveBtn = document.getElementById("save-btn") as HTMLButtonElement;
 
     pathInput.addEventListener("input", () => {
-      this.validatePath(pathInput.value);
+      this.schedulePathValidation(pathInput.value);
     });
 
     browseBtn.addEventListener("click", () => {
@@ -376,9 +381,7 @@ class ReMakeplaceUpdater {
 
         if (mode === "fresh_install") {
           this.setStatus(AppState.FRESH_INSTALL_READY, "Ready for fresh installation");
-          this.updateButton.textContent = "Install ReMakeplace";
-          this.updateButton.disabled = false;
-          this.updateButton.classList.add("btn-install");
+          this.setUpdateButton("Install ReMakeplace", true, "btn-install");
         } else {
           this.checkForUpdates();
         }
@@ -555,6 +558,8 @@ class ReMakeplaceUpdater {
 
   private async setupDeepLinkListener() {
     try {
+      // Loaded on demand so the deep-link bindings stay out of the startup bundle
+      const { onOpenUrl } = await import("@tauri-apps/plugin-deep-link");
       await onOpenUrl(async (urls: string[]) => {
         const url = urls[0];
         try {
@@ -584,7 +589,7 @@ class ReMakeplaceUpdater {
     if (!this.config) return;
 
     this.setStatus(AppState.CHECKING_UPDATES, "Checking for updates...");
-    this.updateButton.disabled = true;
+    this.setUpdateButtonEnabled(false);
 
     try {
       this.updateInfo = await invoke<UpdateInfo>("check_updates", { config: this.config });
@@ -592,24 +597,17 @@ class ReMakeplaceUpdater {
 
       if (this.config.installation_mode === "fresh_install") {
         this.setStatus(AppState.FRESH_INSTALL_READY, `Ready to install version ${this.updateInfo.latest_version}`);
-        this.updateButton.textContent = "Install Now";
-        this.updateButton.disabled = false;
-        this.updateButton.classList.add("btn-install");
+        this.setUpdateButton("Install Now", true, "btn-install");
       } else if (this.updateInfo.is_available) {
         this.setStatus(AppState.UPDATE_AVAILABLE, `Update available: ${this.updateInfo.latest_version}`);
-        this.updateButton.textContent = "Update Now";
-        this.updateButton.disabled = false;
-        this.updateButton.classList.add("btn-update");
+        this.setUpdateButton("Update Now", true, "btn-update");
       } else {
         this.setStatus(AppState.UP_TO_DATE, "You have the latest version");
-        this.updateButton.textContent = "Up to Date";
-        this.updateButton.disabled = true;
-        this.updateButton.classList.remove("btn-update");
+        this.setUpdateButton("Up to Date", false);
       }
     } catch (error) {
       this.setStatus(AppState.ERROR, `Failed to check updates: ${error}`);
-      this.updateButton.disabled = false;
-      this.updateButton.textContent = "Retry";
+      this.setUpdateButton("Retry", true);
     }
   }
 
@@ -632,8 +630,8 @@ class ReMakeplaceUpdater {
 
     const statusMessage = isFreshInstall ? "Starting fresh installation..." : "Starting download...";
     this.setStatus(AppState.DOWNLOADING, statusMessage);
-    this.progressSection.style.display = "block";
-    this.updateButton.disabled = true;
+    this.setProgressVisible(true);
+    this.setUpdateButtonEnabled(false);
 
     try {
       const filename = this.updateInfo.download_url.split("/").pop() || "update.7z";
@@ -645,14 +643,25 @@ class ReMakeplaceUpdater {
       });
     } catch (error) {
       this.setStatus(AppState.ERROR, `Failed to start download: ${error}`);
-      this.progressSection.style.display = "none";
+      this.setProgressVisible(false);
     }
   }
 
-  private updateProgress(progress: ProgressInfo) {
-    const progressFill = this.progressBar.querySelector(".progress-fill") as HTMLElement;
+  // Progress events can outpace rendering; keep only the latest and paint it once per frame
+  private queueProgress(progress: ProgressInfo) {
+    const frameQueued = this.pendingProgress !== null;
+    this.pendingProgress = progress;
+    if (frameQueued) return;
+
+    requestAnimationFrame(() => {
+      const latest = this.pendingProgress;
+      this.pendingProgress = null;
+      if (latest) this.updateProgress(latest);
+    });
+  }
 
-    progressFill.style.width = `${progress.percentage}%`;
+  private updateProgress(progress: ProgressInfo) {
+    this.progressFill.style.width = `${progress.percentage}%`;
 
     const speedText = progress.speed > 0 ? `${progress.speed.toFixed(1)} MB/s` : "0.0 MB/s";
     let statusText = `${progress.percentage.toFixed(1)}% - ${speedText}`;
@@ -678,6 +687,8 @@ class ReMakeplaceUpdater {
     const isFreshInstall = this.config.installation_mode === "fresh_install";
     const statusMessage = isFreshInstall ? "Download complete, starting fresh installation..." : "Download complete, starting installation...";
 
+    // The final progress event arrives just before this one; don't let its queued frame repaint over us
+    this.pendingProgress = null;
     this.setStatus(AppState.INSTALLING, statusMessage);
 
     try {
@@ -691,30 +702,28 @@ class ReMakeplaceUpdater {
 
       await invoke("install_update", {
         archivePath: cachePath,
+        version: this.updateInfo.latest_version,
         config: this.config,
       });
     } catch (error) {
       this.setStatus(AppState.ERROR, `Installation failed: ${error}`);
-      this.progressSection.style.display = "none";
+      this.setProgressVisible(false);
     }
   }
 
-  private async onUpdateComplete() {
-    const wasFreshInstall = this.config?.installation_mode === "fresh_install";
-    const successMessage = wasFreshInstall ? "Fresh installation completed successfully!" : "Update completed successfully!";
-
-    this.setStatus(AppState.UP_TO_DATE, successMessage);
-    this.progressSection.style.display = "none";
-
-    // Update installation mode and version after successful fresh install
-    if (wasFreshInstall && this.config && this.updateInfo) {
-      this.config.installation_mode = "update";
-      this.config.current_version = this.updateInfo.latest_version;
-      await invoke("save_config", { config: this.config });
+  private onUpdateComplete(result: UpdateComplete) {
+    // The backend has already saved the installed version and mode; apply them directly
+    // instead of reloading the config and asking GitHub again
+    this.config = result.config;
+    if (this.updateInfo) {
+      this.updateInfo.is_available = false;
     }
 
-    // Reload configuration to get updated version and status
-    await this.loadConfiguration();
+    this.pendingProgress = null;
+    this.updateUI();
+    this.setStatus(AppState.UP_TO_DATE, result.message);
+    this.setUpdateButton("Up to Date", false);
+    this.setProgressVisible(false);
   }
 
   private async launchGame() {
@@ -770,10 +779,31 @@ class ReMakeplaceUpdater {
     }
   }
 
+  // Typing fires an input event per keystroke; validate once the user pauses
+  private schedulePathValidation(path: string) {
+    const validation = document.getElementById("path-validation")!;
+    const saveBtn = document.getElementById("save-btn") as HTMLButtonElement;
+
+    // The previous path's result no longer applies: block saving until this one is validated,
+    // and let any validation still in flight for the old path go stale
+    this.pathValidationRequest++;
+    validation.innerHTML = "";
+    validation.className = "validation-message";
+    saveBtn.disabled = true;
+
+    window.clearTimeout(this.pathValidationTimer);
+    this.pathValidationTimer = window.setTimeout(() => this.validatePath(path), 250);
+  }
+
   private async validatePath(path: string) {
     const validation = document.getElementById("path-validation")!;
     const saveBtn = document.getElementById("save-btn") as HTMLButtonElement;
 
+    // Results from an older path that resolve late must not overwrite the current one
+    window.clearTimeout(this.pathValidationTimer);
+    const request = ++this.pathValidationRequest;
+    const isStale = () => request !== this.pathValidationRequest;
+
     if (!path.trim()) {
       validation.innerHTML = "";
       validation.className = "validation-message";
@@ -797,6 +827,7 @@ class ReMakeplaceUpdater {
       const modeDescription = await invoke<string>("get_mode_description", {
         mode: mode,
       });
+      if (isStale()) return;
 
       // Validate with detailed error information
       try {
@@ -805,6 +836,7 @@ class ReMakeplaceUpdater {
           exeName: this.config?.exe_path || "Makeplace.exe",
           mode: mode,
         });
+        if (isStale()) return;
 
         // Path is valid
         const modeText = mode === "fresh_install" ? "fresh installation" : "existing installation";
@@ -820,11 +852,13 @@ class ReMakeplaceUpdater {
         validation.className = "validation-message valid";
         saveBtn.disabled = false;
       } catch (errorInfo: any) {
+        if (isStale()) return;
         // Path validation failed with detailed error
         this.showValidationError(validation, errorInfo);
         saveBtn.disabled = true;
       }
     } catch (error) {
+      if (isStale()) return;
       // Fallback for unexpected errors
       validation.innerHTML = `
         <div class="validation-error">
@@ -922,6 +956,29 @@ class ReMakeplaceUpdater {
     }
   }
 
+  // The progress section starts hidden; only touch its style when visibility actually changes
+  private setProgressVisible(visible: boolean) {
+    if (this.progressVisible === visible) return;
+    this.progressVisible = visible;
+    this.progressSection.style.display = visible ? "block" : "none";
+  }
+
+  // Sets the update button's label, enabled state and highlight in one place, touching only what changed
+  private setUpdateButton(text: string, enabled: boolean, variant: "btn-install" | "btn-update" | null = null) {
+    const button = this.updateButton;
+    if (button.textContent !== text) {
+      button.textContent = text;
+    }
+    button.disabled = !enabled;
+    button.classList.toggle("btn-install", variant === "btn-install");
+    button.classList.toggle("btn-update", variant === "btn-update");
+  }
+
+  // Blocks or allows clicks during a transition without changing what the button offers
+  private setUpdateButtonEnabled(enabled: boolean) {
+    this.updateButton.disabled = !enabled;
+  }
+
   private setStatus(state: AppState, message: string, error?: string) {
     this.currentStatus = { state, message, error };
     this.statusMessage.textContent = message;
@@ -937,6 +994,7 @@ class ReMakeplaceUpdater {
   private handleDownloadError(errorInfo: ErrorInfo) {
     const message = errorInfo.is_retryable ? `${errorInfo.user_message} Retrying automatically...` : errorInfo.user_message;
 
+    this.pendingProgress = null;
     this.setStatus(AppState.ERROR, message);
 
     // Show detailed error in console for debugging
@@ -944,8 +1002,9 @@ class ReMakeplaceUpdater {
 
     // If it's retryable, don't hide progress section yet
     if (!errorInfo.is_retryable) {
-      this.progressSection.style.display = "none";
-      this.updateButton.disabled = false;
+      this.setProgressVisible(false);
+      // The button now checks for updates again, so it must not keep its Update/Install look
+      this.setUpdateButton("Retry", true);
     }
   }
 
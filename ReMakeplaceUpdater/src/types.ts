@@ -18,6 +18,11 @@ export interface UpdateInfo {
   is_available: boolean;
 }
 
+export interface UpdateComplete {
+  message: string;
+  config: Config;
+}
+
 export interface ProgressInfo {
   percentage: number;
   speed: number; // MB/s